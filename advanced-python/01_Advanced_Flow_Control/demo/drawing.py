@@ -1,3 +1,4 @@
+import sys
 from functools import singledispatch
 
 
@@ -53,6 +54,52 @@ def _(shape):
     print("\u25b2" if shape.solid else "\u25b3")
 
 
+@singledispatch
+def glyph(shape):
+    """Return the character draw() prints for shape."""
+    raise TypeError("Don't know to draw {!r}".format(shape))
+
+
+@glyph.register(Circle)
+def _(shape):
+    return "\u25cf" if shape.solid else "\u25a1"
+
+
+@glyph.register(Parallelogram)
+def _(shape):
+    return "\u25b0" if shape.solid else "\u25b1"
+
+
+@glyph.register(Triangle)
+def _(shape):
+    return "\u25b2" if shape.solid else "\u25b3"
+
+
+def draw_all(shapes, out=None):
+    """Draw many shapes, with the same output as calling draw() on each.
+
+    The glyph() of each concrete type of shape is looked up once, rather
+    than dispatching again for every shape, and written straight to out
+    rather than printed.
+
+    Args:
+        shapes: An iterable of shapes. Each type of shape needs a glyph()
+            implementation, as well as a draw() one.
+        out: The text stream to draw to, which defaults to sys.stdout. A
+            stream with a large buffer, such as open(path, "w",
+            buffering=2**20), avoids a write system call for every shape.
+    """
+    write = (sys.stdout if out is None else out).write
+    implementations = {}
+    for shape in shapes:
+        cls = type(shape)
+        try:
+            implementation = implementations[cls]
+        except KeyError:
+            implementation = implementations[cls] = glyph.dispatch(cls)
+        write(implementation(shape) + "\n")
+
+
 def main():
     shapes = [
         Circle(center=(0, 0), radius=5, solid=False),
@@ -0,0 +1,143 @@
+import contextlib
+import io
+import os
+import random
+import time
+import tracemalloc
+
+from functools import singledispatch
+
+import drawing_slots
+from drawing import Circle, Parallelogram, Shape, Triangle, draw, draw_all
+from drawing_slots import cached_dispatch
+from drawing_store import ShapeStore
+
+
+def shape_specs(count, seed=0):
+    """Yield (type, attributes) for `count` random shapes."""
+    rng = random.Random(seed)
+
+    def point():
+        return (rng.uniform(-1000, 1000), rng.uniform(-1000, 1000))
+
+    for _ in range(count):
+        kind = rng.randrange(3)
+        solid = rng.random() < 0.5
+        if kind == 0:
+            yield Circle, dict(center=point(), radius=rng.uniform(0, 10), solid=solid)
+        elif kind == 1:
+            yield Parallelogram, dict(pa=point(), pb=point(), pc=point(), solid=solid)
+        else:
+            yield Triangle, dict(pa=point(), pb=point(), pc=point(), solid=solid)
+
+
+def make_shapes(count, seed=0):
+    return [cls(**attributes) for cls, attributes in shape_specs(count, seed)]
+
+
+def make_store(count, seed=0):
+    store = ShapeStore()
+    add = {
+        Circle: store.add_circle,
+        Parallelogram: store.add_parallelogram,
+        Triangle: store.add_triangle,
+    }
+    for cls, attributes in shape_specs(count, seed):
+        add[cls](**attributes)
+    return store
+
+
+def draw_each(shapes, out):
+    with contextlib.redirect_stdout(out):
+        for shape in shapes:
+            draw(shape)
+
+
+def bench_draw_all(count):
+    shapes = make_shapes(count)
+
+    # Both must produce exactly the same text
+    expected, actual = io.StringIO(), io.StringIO()
+    draw_each(shapes, expected)
+    draw_all(shapes, actual)
+    assert expected.getvalue() == actual.getvalue()
+
+    for name, render in (("draw loop", draw_each), ("draw_all", draw_all)):
+        with open(os.devnull, "w", buffering=2**20) as out:
+            start_time = time.perf_counter()
+            render(shapes, out)
+            duration = time.perf_counter() - start_time
+        print(f"{count:>11,} shapes | {name:>9}: {round(duration, 2)} seconds")
+
+
+def bench_memory(count):
+    for name, build in (("classes", make_shapes), ("ShapeStore", make_store)):
+        tracemalloc.start()
+        shapes = build(count)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del shapes
+        print(
+            f"{count:>11,} shapes | {name:>10}: {size / 2**20:8.1f} MiB"
+            f" ({size / count:5.0f} bytes per shape)"
+        )
+
+
+SLOTTED = {
+    Circle: drawing_slots.Circle,
+    Parallelogram: drawing_slots.Parallelogram,
+    Triangle: drawing_slots.Triangle,
+}
+
+
+@singledispatch
+def nothing(shape):
+    """Does nothing, to time dispatch alone."""
+    raise TypeError("Don't know {!r}".format(shape))
+
+
+@nothing.register(Shape)
+@nothing.register(drawing_slots.Shape)
+def _(shape):
+    pass
+
+
+def bench_slots(count):
+    specs = list(shape_specs(count))
+    slotted_specs = [(SLOTTED[cls], attributes) for cls, attributes in specs]
+    cached_nothing = cached_dispatch(nothing)
+
+    for name, variant in (("classes", specs), ("slots", slotted_specs)):
+        # The points are shared with specs, so only the instances are traced
+        tracemalloc.start()
+        shapes = [cls(**attributes) for cls, attributes in variant]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # Time construction again without the overhead of tracemalloc
+        start_time = time.perf_counter()
+        shapes = [cls(**attributes) for cls, attributes in variant]
+        duration = time.perf_counter() - start_time
+        print(
+            f"{count:>11,} shapes | {name:>7}: {count / duration:12,.0f} shapes/s"
+            f" | {size / count:5.0f} bytes per shape"
+        )
+
+        for dispatch_name, function in (
+            ("singledispatch", nothing),
+            ("cached", cached_nothing),
+        ):
+            start_time = time.perf_counter()
+            for shape in shapes:
+                function(shape)
+            duration = time.perf_counter() - start_time
+            print(f"{dispatch_name:>34}: {duration / count * 1e9:6.0f} ns per call")
+
+
+if __name__ == "__main__":
+    for count in (100_000, 1_000_000):
+        bench_draw_all(count)
+
+    for count in (1_000_000, 10_000_000):
+        bench_memory(count)
+
+    bench_slots(1_000_000)
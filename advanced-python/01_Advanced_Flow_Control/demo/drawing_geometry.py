@@ -0,0 +1,271 @@
+import math
+from functools import singledispatch
+
+import numpy as np
+
+from drawing import Circle, Parallelogram, Triangle
+
+# Scalar implementations, one shape at a time. The batch implementations
+# below use the same arithmetic in the same order, so give exactly the
+# same results. The pa, pb and pc points of a Parallelogram are taken to
+# be three consecutive vertices.
+
+
+def cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+@singledispatch
+def area(shape):
+    raise TypeError("Don't know the area of {!r}".format(shape))
+
+
+@area.register(Circle)
+def _(shape):
+    return math.pi * shape.radius * shape.radius
+
+
+@area.register(Parallelogram)
+def _(shape):
+    (ax, ay), (bx, by), (cx, cy) = shape.pa, shape.pb, shape.pc
+    return abs(cross(bx - ax, by - ay, cx - bx, cy - by))
+
+
+@area.register(Triangle)
+def _(shape):
+    (ax, ay), (bx, by), (cx, cy) = shape.pa, shape.pb, shape.pc
+    return abs(cross(bx - ax, by - ay, cx - ax, cy - ay)) / 2
+
+
+@singledispatch
+def bounding_box(shape):
+    """Return the (min_x, min_y, max_x, max_y) bounds of a shape."""
+    raise TypeError("Don't know the bounds of {!r}".format(shape))
+
+
+@bounding_box.register(Circle)
+def _(shape):
+    (x, y), r = shape.center, shape.radius
+    return (x - r, y - r, x + r, y + r)
+
+
+@bounding_box.register(Parallelogram)
+def _(shape):
+    (ax, ay), (bx, by), (cx, cy) = shape.pa, shape.pb, shape.pc
+    # The fourth vertex, opposite pb
+    dx, dy = ax + (cx - bx), ay + (cy - by)
+    return (
+        min(ax, bx, cx, dx),
+        min(ay, by, cy, dy),
+        max(ax, bx, cx, dx),
+        max(ay, by, cy, dy),
+    )
+
+
+@bounding_box.register(Triangle)
+def _(shape):
+    (ax, ay), (bx, by), (cx, cy) = shape.pa, shape.pb, shape.pc
+    return (min(ax, bx, cx), min(ay, by, cy), max(ax, bx, cx), max(ay, by, cy))
+
+
+@singledispatch
+def contains(shape, point):
+    """Return whether point lies inside shape, or on its boundary."""
+    raise TypeError("Don't know the inside of {!r}".format(shape))
+
+
+@contains.register(Circle)
+def _(shape, point):
+    (x, y), r = shape.center, shape.radius
+    px, py = point
+    return (px - x) * (px - x) + (py - y) * (py - y) <= r * r
+
+
+@contains.register(Parallelogram)
+def _(shape, point):
+    (ax, ay), (bx, by), (cx, cy) = shape.pa, shape.pb, shape.pc
+    px, py = point
+    # Solve p = pa + s * (pb - pa) + t * (pc - pb) for s and t
+    d = cross(bx - ax, by - ay, cx - bx, cy - by)
+    if d == 0:
+        return False
+    s = cross(px - ax, py - ay, cx - bx, cy - by) / d
+    t = cross(bx - ax, by - ay, px - ax, py - ay) / d
+    return 0 <= s <= 1 and 0 <= t <= 1
+
+
+@contains.register(Triangle)
+def _(shape, point):
+    (ax, ay), (bx, by), (cx, cy) = shape.pa, shape.pb, shape.pc
+    px, py = point
+    # A triangle with no area contains nothing
+    if cross(bx - ax, by - ay, cx - ax, cy - ay) == 0:
+        return False
+    # The point is inside when it is on the same side of all three edges
+    d1 = cross(bx - ax, by - ay, px - ax, py - ay)
+    d2 = cross(cx - bx, cy - by, px - bx, py - by)
+    d3 = cross(ax - cx, ay - cy, px - cx, py - cy)
+    negative = d1 < 0 or d2 < 0 or d3 < 0
+    positive = d1 > 0 or d2 > 0 or d3 > 0
+    return not (negative and positive)
+
+
+# Batch implementations, over columns of arrays holding many shapes of one
+# type, in the layout of ShapeStore (circles have center_x, center_y and
+# radius; parallelograms and triangles have pa_x, pa_y, ..., pc_y).
+
+
+def vertices(columns):
+    return [
+        np.asarray(columns[name])
+        for name in ("pa_x", "pa_y", "pb_x", "pb_y", "pc_x", "pc_y")
+    ]
+
+
+def circle_areas(columns):
+    r = np.asarray(columns["radius"])
+    return math.pi * r * r
+
+
+def parallelogram_areas(columns):
+    ax, ay, bx, by, cx, cy = vertices(columns)
+    return np.abs(cross(bx - ax, by - ay, cx - bx, cy - by))
+
+
+def triangle_areas(columns):
+    ax, ay, bx, by, cx, cy = vertices(columns)
+    return np.abs(cross(bx - ax, by - ay, cx - ax, cy - ay)) / 2
+
+
+def circle_bounding_boxes(columns):
+    x, y = np.asarray(columns["center_x"]), np.asarray(columns["center_y"])
+    r = np.asarray(columns["radius"])
+    return np.stack([x - r, y - r, x + r, y + r], axis=-1)
+
+
+def parallelogram_bounding_boxes(columns):
+    ax, ay, bx, by, cx, cy = vertices(columns)
+    xs = np.stack([ax, bx, cx, ax + (cx - bx)])
+    ys = np.stack([ay, by, cy, ay + (cy - by)])
+    return np.stack(
+        [xs.min(axis=0), ys.min(axis=0), xs.max(axis=0), ys.max(axis=0)], axis=-1
+    )
+
+
+def triangle_bounding_boxes(columns):
+    ax, ay, bx, by, cx, cy = vertices(columns)
+    xs, ys = np.stack([ax, bx, cx]), np.stack([ay, by, cy])
+    return np.stack(
+        [xs.min(axis=0), ys.min(axis=0), xs.max(axis=0), ys.max(axis=0)], axis=-1
+    )
+
+
+def circle_contains(columns, point):
+    x, y = np.asarray(columns["center_x"]), np.asarray(columns["center_y"])
+    r = np.asarray(columns["radius"])
+    px, py = point
+    return (px - x) * (px - x) + (py - y) * (py - y) <= r * r
+
+
+def parallelogram_contains(columns, point):
+    ax, ay, bx, by, cx, cy = vertices(columns)
+    px, py = point
+    d = cross(bx - ax, by - ay, cx - bx, cy - by)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = cross(px - ax, py - ay, cx - bx, cy - by) / d
+        t = cross(bx - ax, by - ay, px - ax, py - ay) / d
+    return (d != 0) & (0 <= s) & (s <= 1) & (0 <= t) & (t <= 1)
+
+
+def triangle_contains(columns, point):
+    ax, ay, bx, by, cx, cy = vertices(columns)
+    px, py = point
+    d1 = cross(bx - ax, by - ay, px - ax, py - ay)
+    d2 = cross(cx - bx, cy - by, px - bx, py - by)
+    d3 = cross(ax - cx, ay - cy, px - cx, py - cy)
+    d = cross(bx - ax, by - ay, cx - ax, cy - ay)
+    negative = (d1 < 0) | (d2 < 0) | (d3 < 0)
+    positive = (d1 > 0) | (d2 > 0) | (d3 > 0)
+    return (d != 0) & ~(negative & positive)
+
+
+AREAS = {
+    Circle: circle_areas,
+    Parallelogram: parallelogram_areas,
+    Triangle: triangle_areas,
+}
+
+BOUNDING_BOXES = {
+    Circle: circle_bounding_boxes,
+    Parallelogram: parallelogram_bounding_boxes,
+    Triangle: triangle_bounding_boxes,
+}
+
+CONTAINS = {
+    Circle: circle_contains,
+    Parallelogram: parallelogram_contains,
+    Triangle: triangle_contains,
+}
+
+
+def batch(kernels, cls):
+    try:
+        return kernels[cls]
+    except KeyError as e:
+        raise TypeError("No batch implementation for {!r}".format(cls)) from e
+
+
+def areas(cls, columns):
+    """Return an array with the area of each shape of type cls in columns."""
+    return batch(AREAS, cls)(columns)
+
+
+def bounding_boxes(cls, columns):
+    """Return an (n, 4) array of the bounding box of each shape in columns."""
+    return batch(BOUNDING_BOXES, cls)(columns)
+
+
+def contains_point(cls, columns, point):
+    """Return a boolean array telling which shapes in columns contain point."""
+    return batch(CONTAINS, cls)(columns, point)
+
+
+if __name__ == "__main__":
+    import time
+
+    from drawing_benchmark import make_store
+
+    store = make_store(1_000_000)
+    point = (12.5, -40.0)
+    tables = {
+        Circle: store.circles,
+        Parallelogram: store.parallelograms,
+        Triangle: store.triangles,
+    }
+
+    for cls, view_cls in zip(tables, store.KINDS):
+        columns = tables[cls]
+        shapes = [view_cls(columns, index) for index in range(len(columns["solid"]))]
+
+        start_time = time.perf_counter()
+        expected = (
+            np.array([area(shape) for shape in shapes]),
+            np.array([bounding_box(shape) for shape in shapes]),
+            np.array([contains(shape, point) for shape in shapes]),
+        )
+        scalar_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        actual = (
+            areas(cls, columns),
+            bounding_boxes(cls, columns),
+            contains_point(cls, columns, point),
+        )
+        batch_time = time.perf_counter() - start_time
+
+        for expected_values, actual_values in zip(expected, actual):
+            assert np.array_equal(expected_values, actual_values)
+        print(
+            f"{len(shapes):>9,} {cls.__name__:<13} | scalar: {round(scalar_time, 2)} s"
+            f" | batch: {round(batch_time, 3)} s"
+        )
@@ -0,0 +1,186 @@
+import math
+from collections import defaultdict
+
+from drawing_geometry import bounding_box
+
+# Shapes whose bounding boxes touch more cells than this, or are infinite,
+# are kept apart and checked by every query instead
+MAX_CELLS = 4_096
+
+
+def overlaps(a, b):
+    """Return whether two (min_x, min_y, max_x, max_y) boxes overlap."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def in_range(cell, cell_range):
+    i, j = cell
+    min_i, min_j, max_i, max_j = cell_range
+    return min_i <= i <= max_i and min_j <= j <= max_j
+
+
+class GridIndex:
+    """A uniform grid spatial index over the bounding boxes of shapes.
+
+    The plane is divided into square cells of cell_size, and each shape
+    is listed in every cell its bounding box touches. A query only looks
+    at the cells touched by the query rectangle, so its cost depends on
+    the number of shapes nearby rather than the total number of shapes.
+    Works best when cell_size is close to the size of a typical shape.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.boxes = {}
+        self.large = set()
+
+    @classmethod
+    def build(cls, shapes, cell_size):
+        index = cls(cell_size)
+        for shape in shapes:
+            index.insert(shape)
+        return index
+
+    def _cell_range(self, box):
+        """Return the (min_i, min_j, max_i, max_j) cells touched by box.
+
+        Returns None if box has infinite or NaN coordinates.
+        """
+        size = self.cell_size
+        try:
+            return tuple(math.floor(value / size) for value in box)
+        except (OverflowError, ValueError):
+            return None
+
+    @staticmethod
+    def _count(cell_range):
+        min_i, min_j, max_i, max_j = cell_range
+        return max(0, max_i - min_i + 1) * max(0, max_j - min_j + 1)
+
+    @staticmethod
+    def _cells(cell_range):
+        min_i, min_j, max_i, max_j = cell_range
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                yield (i, j)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, shape):
+        return shape in self.boxes
+
+    def insert(self, shape):
+        if shape in self.boxes:
+            raise ValueError("Shape {!r} is already indexed".format(shape))
+        box = self.boxes[shape] = bounding_box(shape)
+        cell_range = self._cell_range(box)
+        if cell_range is None or self._count(cell_range) > MAX_CELLS:
+            self.large.add(shape)
+            return
+        for cell in self._cells(cell_range):
+            self.cells[cell].add(shape)
+
+    def remove(self, shape):
+        try:
+            box = self.boxes.pop(shape)
+        except KeyError as e:
+            raise ValueError("Shape {!r} is not indexed".format(shape)) from e
+        if shape in self.large:
+            self.large.remove(shape)
+            return
+        for cell in self._cells(self._cell_range(box)):
+            shapes = self.cells[cell]
+            shapes.discard(shape)
+            if not shapes:
+                del self.cells[cell]
+
+    def query(self, rect):
+        """Return the shapes whose bounding boxes overlap rect.
+
+        Args:
+            rect: A (min_x, min_y, max_x, max_y) rectangle, such as a
+                viewport.
+
+        Returns:
+            A set of candidate shapes. Their bounding boxes overlap rect,
+            but the shapes themselves may not.
+        """
+        found = set(self.large)
+        cell_range = self._cell_range(rect)
+        if cell_range is None or self._count(cell_range) > len(self.cells):
+            # Looking up every cell of rect would take longer than going
+            # through the occupied ones
+            for cell, shapes in self.cells.items():
+                if cell_range is None or in_range(cell, cell_range):
+                    found.update(shapes)
+        else:
+            for cell in self._cells(cell_range):
+                shapes = self.cells.get(cell)
+                if shapes:
+                    found.update(shapes)
+        boxes = self.boxes
+        return {shape for shape in found if overlaps(boxes[shape], rect)}
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from drawing import Circle, Parallelogram, Triangle
+
+    rng = random.Random(0)
+
+    def near(x, y):
+        return (x + rng.uniform(-5, 5), y + rng.uniform(-5, 5))
+
+    def random_shape():
+        x, y = rng.uniform(-10_000, 10_000), rng.uniform(-10_000, 10_000)
+        solid = rng.random() < 0.5
+        kind = rng.randrange(3)
+        if kind == 0:
+            return Circle(center=(x, y), radius=rng.uniform(0, 5), solid=solid)
+        elif kind == 1:
+            return Parallelogram(
+                pa=near(x, y), pb=near(x, y), pc=near(x, y), solid=solid
+            )
+        else:
+            return Triangle(pa=near(x, y), pb=near(x, y), pc=near(x, y), solid=solid)
+
+    count = 1_000_000
+    shapes = [random_shape() for _ in range(count)]
+
+    start_time = time.perf_counter()
+    index = GridIndex.build(shapes, cell_size=20)
+    print(f"Indexed {count:,} shapes in {round(time.perf_counter() - start_time, 2)} s")
+
+    viewports = []
+    for _ in range(100):
+        x, y = rng.uniform(-10_000, 9_900), rng.uniform(-10_000, 9_900)
+        viewports.append((x, y, x + 100, y + 100))
+
+    boxes = list(index.boxes.items())
+    start_time = time.perf_counter()
+    expected = [
+        {shape for shape, box in boxes if overlaps(box, viewport)}
+        for viewport in viewports
+    ]
+    scan_time = (time.perf_counter() - start_time) / len(viewports)
+
+    start_time = time.perf_counter()
+    found = [index.query(viewport) for viewport in viewports]
+    query_time = (time.perf_counter() - start_time) / len(viewports)
+
+    assert found == expected
+    print(f"Linear scan: {scan_time * 1000:8.3f} ms per query")
+    print(f"Grid index:  {query_time * 1000:8.3f} ms per query")
+
+    # Incremental updates keep the index consistent
+    removed = shapes[: count // 10]
+    for shape in removed:
+        index.remove(shape)
+    assert len(index) == count - len(removed)
+    for shape in removed:
+        index.insert(shape)
+    assert [index.query(viewport) for viewport in viewports] == expected
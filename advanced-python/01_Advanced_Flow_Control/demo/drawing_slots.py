@@ -0,0 +1,101 @@
+from functools import wraps
+
+import drawing
+
+
+class Shape:
+
+    __slots__ = ("solid",)
+
+    def __init__(self, solid):
+        self.solid = solid
+
+
+class Circle(Shape):
+
+    __slots__ = ("center", "radius")
+
+    def __init__(self, center, radius, solid):
+        self.solid = solid
+        self.center = center
+        self.radius = radius
+
+
+class Parallelogram(Shape):
+
+    __slots__ = ("pa", "pb", "pc")
+
+    def __init__(self, pa, pb, pc, solid):
+        self.solid = solid
+        self.pa = pa
+        self.pb = pb
+        self.pc = pc
+
+
+class Triangle(Shape):
+
+    __slots__ = ("pa", "pb", "pc")
+
+    def __init__(self, pa, pb, pc, solid):
+        self.solid = solid
+        self.pa = pa
+        self.pb = pb
+        self.pc = pc
+
+
+# Slotted shapes are drawn just like the shapes they mirror, one at a time
+# with draw() or many with draw_all()
+for slotted, shape in (
+    (Circle, drawing.Circle),
+    (Parallelogram, drawing.Parallelogram),
+    (Triangle, drawing.Triangle),
+):
+    drawing.draw.register(slotted, drawing.draw.dispatch(shape))
+    drawing.glyph.register(slotted, drawing.glyph.dispatch(shape))
+
+
+def cached_dispatch(function):
+    """Put a dict keyed by type in front of a singledispatch function.
+
+    singledispatch already caches its lookups, but checks on every call
+    whether ABC registrations have changed. This skips that check, so
+    implementations must be registered through the returned function,
+    which clears the cache, rather than on the original one.
+    """
+    implementations = {}
+
+    @wraps(function)
+    def wrapper(arg, *args, **kwargs):
+        cls = arg.__class__
+        try:
+            implementation = implementations[cls]
+        except KeyError:
+            implementation = implementations[cls] = function.dispatch(cls)
+        return implementation(arg, *args, **kwargs)
+
+    def register(cls, func=None):
+        implementations.clear()
+        return function.register(cls, func)
+
+    wrapper.register = register
+    wrapper.dispatch = function.dispatch
+    wrapper.registry = function.registry
+    return wrapper
+
+
+cached_draw = cached_dispatch(drawing.draw)
+
+
+def main():
+    shapes = [
+        Circle(center=(0, 0), radius=5, solid=False),
+        Parallelogram(pa=(0, 0), pb=(2, 0), pc=(1, 1), solid=False),
+        Triangle(pa=(0, 0), pb=(1, 2), pc=(2, 0), solid=True),
+    ]
+
+    for shape in shapes:
+        cached_draw(shape)
+
+
+if __name__ == "__main__":
+    main()
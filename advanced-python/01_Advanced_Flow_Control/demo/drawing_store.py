@@ -0,0 +1,154 @@
+from array import array
+
+from drawing import Circle, Parallelogram, Triangle
+
+
+def column_property(name):
+    def get(self):
+        return self._columns[name][self._index]
+
+    return property(get)
+
+
+def point_property(name):
+    x, y = f"{name}_x", f"{name}_y"
+
+    def get(self):
+        return (self._columns[x][self._index], self._columns[y][self._index])
+
+    return property(get)
+
+
+def solid_property():
+    def get(self):
+        return bool(self._columns["solid"][self._index])
+
+    return property(get)
+
+
+class CircleView(Circle):
+    """A Circle whose attributes are read from the columns of a ShapeStore."""
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    center = point_property("center")
+    radius = column_property("radius")
+    solid = solid_property()
+
+
+class ParallelogramView(Parallelogram):
+    """A Parallelogram whose attributes are read from a ShapeStore."""
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    pa = point_property("pa")
+    pb = point_property("pb")
+    pc = point_property("pc")
+    solid = solid_property()
+
+
+class TriangleView(Triangle):
+    """A Triangle whose attributes are read from a ShapeStore."""
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    pa = point_property("pa")
+    pb = point_property("pb")
+    pc = point_property("pc")
+    solid = solid_property()
+
+
+def make_columns(*points, scalars=()):
+    """Make empty columns for the named points and scalar attributes."""
+    columns = {}
+    for name in points:
+        columns[f"{name}_x"] = array("d")
+        columns[f"{name}_y"] = array("d")
+    for name in scalars:
+        columns[name] = array("d")
+    # One byte per flag, rather than a pointer to True or False
+    columns["solid"] = array("b")
+    return columns
+
+
+def points(solid, **named_points):
+    """Flatten named (x, y) points into a dict of column values."""
+    values = {}
+    for name, (x, y) in named_points.items():
+        values[f"{name}_x"] = x
+        values[f"{name}_y"] = y
+    values["solid"] = solid
+    return values
+
+
+class ShapeStore:
+    """Shapes stored as contiguous arrays of their attributes.
+
+    Each type of shape has its own dict of columns, with one array per
+    coordinate or attribute. Shapes are read back as views, made on each
+    access, which are instances of Circle, Parallelogram or Triangle, so
+    they work with draw() and other functions dispatching on type. Views
+    hold only the columns and an index, but like the shapes they subclass
+    they have a __dict__, so keeping many of them around costs as much
+    as keeping the shapes themselves.
+    """
+
+    # The code of each type of shape in self.kinds is its position here,
+    # and in self.tables
+    KINDS = (CircleView, ParallelogramView, TriangleView)
+
+    def __init__(self):
+        self.circles = make_columns("center", scalars=("radius",))
+        self.parallelograms = make_columns("pa", "pb", "pc")
+        self.triangles = make_columns("pa", "pb", "pc")
+        self.tables = (self.circles, self.parallelograms, self.triangles)
+        # The type of each shape, and its index in the columns of that
+        # type, in the order the shapes were added
+        self.kinds = array("B")
+        self.indices = array("L")
+
+    def _append(self, kind, columns, values):
+        index = len(columns["solid"])
+        for name, value in values.items():
+            columns[name].append(value)
+        self.kinds.append(kind)
+        self.indices.append(index)
+
+    def add_circle(self, center, radius, solid):
+        values = points(center=center, solid=solid)
+        values["radius"] = radius
+        self._append(0, self.circles, values)
+
+    def add_parallelogram(self, pa, pb, pc, solid):
+        self._append(1, self.parallelograms, points(pa=pa, pb=pb, pc=pc, solid=solid))
+
+    def add_triangle(self, pa, pb, pc, solid):
+        self._append(2, self.triangles, points(pa=pa, pb=pb, pc=pc, solid=solid))
+
+    def add(self, shape):
+        """Add a copy of an existing Circle, Parallelogram or Triangle."""
+        if isinstance(shape, Circle):
+            self.add_circle(shape.center, shape.radius, shape.solid)
+        elif isinstance(shape, Parallelogram):
+            self.add_parallelogram(shape.pa, shape.pb, shape.pc, shape.solid)
+        elif isinstance(shape, Triangle):
+            self.add_triangle(shape.pa, shape.pb, shape.pc, shape.solid)
+        else:
+            raise TypeError("Can't store shape {!r}".format(shape))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        kind = self.kinds[index]
+        return self.KINDS[kind](self.tables[kind], self.indices[index])
+
+    def __iter__(self):
+        for kind, index in zip(self.kinds, self.indices):
+            yield self.KINDS[kind](self.tables[kind], index)
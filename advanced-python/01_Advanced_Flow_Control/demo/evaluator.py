@@ -1,8 +1,43 @@
+import json
+import math
+import operator
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, dropwhile
+from time import perf_counter_ns
+
+Compiled = namedtuple("Compiled", ["code", "tail"])
+Outcome = namedtuple("Outcome", ["result", "error"])
+
+
+class OperatorName(namedtuple("OperatorName", ["name"])):
+    """An operator module function, which is pickled by its name."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        # Unpickling looks the function up again in the operator module
+        return operator_by_name, (self.name,)
+
+
+def operator_by_name(name):
+    return getattr(operator, name)
+
+
+# A single instance per operator, so that pickle sends each name only once
+OPERATOR_NAMES = {
+    function: OperatorName(name)
+    for name, function in vars(operator).items()
+    if callable(function) and not name.startswith("_")
+}
+
+
 def is_comment(item):
     return isinstance(item, str) and item.startswith("#")
 
 
-def execute(program):
+def execute(program, profile=None):
     """Execute a stack program.
 
     Args:
@@ -14,7 +49,18 @@ def execute(program):
             item = stack.pop()  # Remove and return the top item
             stack.append(item)  # Push an item to the top
             if stack:           # False in a boolean context when empty
+
+        profile: An optional Profile which records statistics about each
+            operator. The program must then also be iterable, and is
+            copied rather than consumed.
+
+    Returns:
+        The operands left pending when the program completes (the final
+        result followed by any trailing operands), or None on failure.
     """
+    if profile is not None:
+        return profile.execute(program)
+
     # Find the start of the 'program' by skipping
     # any item which is a comment
     while program:
@@ -42,11 +88,262 @@ def execute(program):
             pending.append(item)
     else:  # nobreak
         print("Program complete.")
+        return pending
 
 
-if __name__ == "__main__":
-    import operator
+def skip_comments(items):
+    """Skip leading comments in items given in source order.
+
+    Returns:
+        An iterator over the items from the first non-comment, or None
+        if there is no such item.
+    """
+    items = dropwhile(is_comment, items)
+    for first in items:
+        return chain((first,), items)
+    else:  # nobreak
+        return None
+
+
+def evaluate_stream(items):
+    """Evaluate items in source order, with any comments already skipped.
+
+    Returns:
+        The same value as execute(). Any error raised by an operator
+        propagates to the caller.
+    """
+    pending = []
+    for item in items:
+        if callable(item):
+            result = item(*pending)
+            # execute() would pop a callable result and call it at once
+            while callable(result):
+                result = result()
+            pending.clear()
+            pending.append(result)
+        else:
+            pending.append(item)
+    return pending
+
+
+class Profile:
+    """Per-operator statistics collected while executing stack programs.
+
+    For each operator, counts the calls, the total number of arguments
+    passed and the cumulative time spent in it. Operators are reported by
+    name, with "#2", "#3", ... appended to the names of different
+    callables sharing one, such as lambdas. Also tracks the peak depth of the program stack and of the
+    pending operands across all programs executed with this profile.
+    """
+
+    def __init__(self):
+        self.operators = {}
+        self.peak_stack = 0
+        self.peak_pending = 0
+        self._wrappers = {}
+
+    def wrap(self, function):
+        """Return a callable which records calls to function."""
+        # Keyed by id() as operators are not necessarily hashable
+        try:
+            return self._wrappers[id(function)][1]
+        except KeyError:
+            pass
+
+        # Each callable has its own statistics, even if it shares its name
+        base = name = getattr(function, "__qualname__", repr(function))
+        count = 1
+        while name in self.operators:
+            count += 1
+            name = f"{base}#{count}"
+        stats = self.operators[name] = {"calls": 0, "arguments": 0, "time_ns": 0}
+
+        def wrapper(*args):
+            start = perf_counter_ns()
+            try:
+                return function(*args)
+            finally:
+                stats["time_ns"] += perf_counter_ns() - start
+                stats["calls"] += 1
+                stats["arguments"] += len(args)
+                # Operators consume all the pending operands
+                self.peak_pending = max(self.peak_pending, len(args))
+
+        self._wrappers[id(function)] = (function, wrapper)
+        return wrapper
+
+    def execute(self, program):
+        """Execute a copy of program with each operator instrumented."""
+        stack = [self.wrap(item) if callable(item) else item for item in program]
+        # The stack only shrinks while a program runs
+        self.peak_stack = max(self.peak_stack, len(stack))
+        result = execute(stack)
+        if result is not None:
+            self.peak_pending = max(self.peak_pending, len(result))
+        return result
+
+    def report(self):
+        return {
+            "operators": {name: dict(stats) for name, stats in self.operators.items()},
+            "peak_stack": self.peak_stack,
+            "peak_pending": self.peak_pending,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+
+def execute_stream(program):
+    """Execute a stack program as its items arrive.
+
+    Unlike execute(), the program does not need to be materialized and
+    reversed up front, so only the pending operands are held in memory.
 
+    Args:
+        program: Any iterable of items in source order, i.e. with the
+            operands before the operator which consumes them, such as a
+            generator reading from a file or socket. Leading strings
+            beginning with '#' are comments.
+
+    Returns:
+        The same value as execute() for the equivalent stack program.
+    """
+    items = skip_comments(program)
+    if items is None:
+        print("Empty program!")
+        return None
+
+    try:
+        pending = evaluate_stream(items)
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+    print("Program complete.")
+    return pending
+
+
+def compile(program):
+    """Compile a stack program into a flat sequence of calls.
+
+    Comments are stripped once and each operator is paired with the
+    literal operands which precede it, so its arity is resolved ahead of
+    time. Every call after the first also receives the result of the
+    previous call as its first argument, just as execute() pushes the
+    result back onto the stack.
+
+    Args:
+        program: A stack program in the same form accepted by execute(),
+            which must also support reversed(). It is not consumed.
+
+    Returns:
+        A Compiled program, where code is a tuple of (operator, operands)
+        pairs and tail holds any operands following the last operator.
+    """
+    code = []
+    pending = []
+    for item in dropwhile(is_comment, reversed(program)):
+        if callable(item):
+            code.append((item, tuple(pending)))
+            pending.clear()
+        else:
+            pending.append(item)
+    return Compiled(code=tuple(code), tail=tuple(pending))
+
+
+def evaluate(compiled):
+    """Evaluate a non-empty program produced by compile().
+
+    Returns:
+        The same value as execute(). Any error raised by an operator
+        propagates to the caller.
+    """
+    code = iter(compiled.code)
+    for function, arguments in code:
+        result = function(*arguments)
+        # execute() would pop a callable result and call it at once
+        while callable(result):
+            result = result()
+        # Every later call takes the previous result as its first operand
+        for function, arguments in code:
+            result = function(result, *arguments)
+            while callable(result):
+                result = result()
+        return [result, *compiled.tail]
+    else:  # nobreak
+        return list(compiled.tail)
+
+
+def run(compiled):
+    """Run a program produced by compile().
+
+    Prints the same messages as execute() and returns the same value.
+    """
+    if not compiled.code and not compiled.tail:
+        print("Empty program!")
+        return None
+
+    try:
+        result = evaluate(compiled)
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+    print("Program complete.")
+    return result
+
+
+def encode(item):
+    """Replace an operator module function by its name for pickling."""
+    try:
+        return OPERATOR_NAMES.get(item, item)
+    except TypeError:  # Unhashable operand
+        return item
+
+
+def execute_chunk(chunk):
+    """Execute programs in a worker process, without printing."""
+    outcomes = []
+    for program in chunk:
+        items = skip_comments(reversed(program))
+        if items is None:
+            outcomes.append(Outcome(result=None, error="Empty program!"))
+            continue
+        try:
+            result = evaluate_stream(items)
+        except Exception as e:
+            outcomes.append(Outcome(result=None, error=f"Error: {e}"))
+        else:
+            outcomes.append(Outcome(result=result, error=None))
+    return outcomes
+
+
+def execute_many(programs, workers=None, chunksize=None):
+    """Execute independent stack programs in parallel worker processes.
+
+    Args:
+        programs: A sequence of stack programs in the same form accepted
+            by execute(). They are not consumed.
+        workers: The number of worker processes, which defaults to the
+            number of CPUs.
+        chunksize: The number of programs sent to a worker at a time,
+            which defaults to a few chunks per worker.
+
+    Returns:
+        A list of Outcome(result, error) in the same order as programs,
+        where result is the value execute() would return and error is the
+        message it would print on failure, or None on success.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(programs) / (workers * 4)))
+    chunks = [
+        [[encode(item) for item in program] for program in programs[i : i + chunksize]]
+        for i in range(0, len(programs), chunksize)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(chain.from_iterable(executor.map(execute_chunk, chunks)))
+
+
+if __name__ == "__main__":
     program = list(
         reversed(
             (
@@ -61,4 +358,9 @@ if __name__ == "__main__":
         )
     )
 
+    profile = Profile()
+    execute(list(program), profile=profile)
+    print(profile.to_json(indent=2))
+    execute_stream(reversed(program))
+    run(compile(program))
     execute(program)
@@ -0,0 +1,243 @@
+import operator
+
+import numpy as np
+
+from evaluator import compile
+
+# Operators from the operator module which have an equivalent NumPy ufunc.
+# pow is left out: NumPy refuses negative integer exponents where Python
+# gives a float, so it runs row by row instead
+UFUNCS = {
+    operator.add: np.add,
+    operator.sub: np.subtract,
+    operator.mul: np.multiply,
+    operator.truediv: np.true_divide,
+    operator.floordiv: np.floor_divide,
+    operator.mod: np.remainder,
+    operator.neg: np.negative,
+    operator.abs: np.absolute,
+    operator.and_: np.bitwise_and,
+    operator.or_: np.bitwise_or,
+    operator.xor: np.bitwise_xor,
+    operator.lt: np.less,
+    operator.le: np.less_equal,
+    operator.eq: np.equal,
+    operator.ne: np.not_equal,
+    operator.ge: np.greater_equal,
+    operator.gt: np.greater,
+}
+
+# Ufuncs for which a zero second operand is an error in execute()
+DIVISIONS = {np.true_divide, np.floor_divide, np.remainder}
+
+# Ufuncs for which Python computes with booleans as the ints 0 and 1, where
+# NumPy keeps them booleans or refuses them (True - True)
+ARITHMETIC = {
+    np.add,
+    np.subtract,
+    np.multiply,
+    np.true_divide,
+    np.floor_divide,
+    np.remainder,
+    np.negative,
+    np.absolute,
+}
+
+
+def as_number(value):
+    """Return value with booleans, such as comparison results, as int64."""
+    array = np.asarray(value)
+    if array.dtype == bool:
+        return array.astype(np.int64)
+    return value
+
+
+def apply_rows(function, arguments, failed=np.False_):
+    """Apply a scalar operator row by row, recording rows which raise.
+
+    Rows already marked in failed are skipped.
+    """
+    *arrays, failed = np.broadcast_arrays(*arguments, failed)
+    # As Python objects, so that operators behave as they do in execute()
+    arrays = [array.astype(object) for array in arrays]
+    shape = failed.shape
+    result = np.empty(shape, dtype=object)
+    errors = np.zeros(shape, dtype=bool)
+    for index in np.ndindex(shape):
+        if failed[index]:
+            continue
+        try:
+            result[index] = function(*(array[index] for array in arrays))
+        except Exception:
+            errors[index] = True
+    return result, errors
+
+
+def execute_batch(program, columns):
+    """Execute one stack program over many rows of operands at once.
+
+    Args:
+        program: A stack program in the same form accepted by compile().
+            Operands may be scalars, arrays, or names of columns.
+        columns: A mapping of column names to array-like values (NumPy
+            arrays, array.array, pandas Series, ...). String operands
+            naming a column are replaced by that column.
+
+    Returns:
+        A masked array holding the final result for each row, where rows
+        which failed (such as a division by zero) are masked rather than
+        stopping the whole run, and skipped by the operators after. Trailing
+        operands after the last operator are ignored. Returns None if the
+        program as a whole is invalid.
+
+        Operators with a NumPy ufunc compute in the fixed-width types of
+        their operands, so unlike execute(), integer results which
+        overflow int64 wrap around instead of growing.
+    """
+    compiled = compile(program)
+    if not compiled.code and not compiled.tail:
+        print("Empty program!")
+        return None
+
+    def resolve(item):
+        if isinstance(item, str) and item in columns:
+            return np.asarray(columns[item])
+        return item
+
+    if not compiled.code:
+        result = resolve(compiled.tail[0])
+    failed = np.False_
+    # Failed rows hold arbitrary values, so silence warnings computed on them
+    with np.errstate(all="ignore"):
+        operands = ()
+        try:
+            for function, arguments in compiled.code:
+                arguments = (*operands, *map(resolve, arguments))
+                ufunc = UFUNCS.get(function)
+                if ufunc is None:
+                    result, errors = apply_rows(function, arguments, failed)
+                    failed = failed | errors
+                    operands = (result,)
+                    continue
+                if len(arguments) != ufunc.nin:
+                    # NumPy would take an extra operand as the output array,
+                    # so fail the way the scalar operator does in execute()
+                    function(*arguments)
+                    raise TypeError(
+                        f"{function.__name__}() takes {ufunc.nin} operand(s)"
+                        f" ({len(arguments)} given)"
+                    )
+                if ufunc in ARITHMETIC:
+                    arguments = tuple(map(as_number, arguments))
+                if ufunc in DIVISIONS:
+                    failed = failed | (np.asarray(arguments[1]) == 0)
+                if np.any(failed):
+                    # Leave failed rows out, as they may not hold numbers,
+                    # and dividing object arrays by zero would raise
+                    result = ufunc(*arguments, out=None, where=~failed)
+                else:
+                    result = ufunc(*arguments)
+                operands = (result,)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    print("Program complete.")
+    shape = np.broadcast_shapes(np.shape(result), np.shape(failed))
+    return np.ma.masked_array(
+        np.broadcast_to(result, shape),
+        mask=np.broadcast_to(failed, shape),
+    )
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+
+    from evaluator import run
+
+    # (x + 2) * 3 / y, with some rows dividing by zero
+    program = list(
+        reversed(
+            (
+                "# Scale and divide each row",
+                "x",
+                2,
+                operator.add,
+                3,
+                operator.mul,
+                "y",
+                operator.truediv,
+            )
+        )
+    )
+
+    rows = 1_000_000
+    rng = np.random.default_rng(0)
+    columns = {
+        "x": rng.integers(0, 100, rows),
+        "y": rng.integers(0, 10, rows),
+    }
+
+    start_time = time.perf_counter()
+    batch = execute_batch(program, columns)
+    batch_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        per_row = [
+            run(
+                compile(
+                    [operator.truediv, int(y), operator.mul, 3, operator.add, 2, int(x)]
+                )
+            )
+            for x, y in zip(columns["x"], columns["y"])
+        ]
+    row_time = time.perf_counter() - start_time
+
+    assert [
+        None if masked else [value] for value, masked in zip(batch.data, batch.mask)
+    ] == per_row
+    print(f"Rows: {rows:,} | failed: {batch.mask.sum():,}")
+    print(f"Per-row run: {round(row_time, 2)} seconds")
+    print(f"execute_batch: {round(batch_time, 3)} seconds")
+
+    def run_rows(program, columns, rows):
+        """Run program with run() on each row, with the values of the row."""
+        results = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for index in range(rows):
+                row = [
+                    columns[item][index].item() if item in columns else item
+                    for item in program
+                ]
+                results.append(run(compile(row)))
+        return results
+
+    # Comparisons give booleans, which the operators after must treat as
+    # Python does, as the ints 0 and 1. repr() tells apart True and 1
+    programs = [
+        ("x", 50, operator.gt, "y", operator.add),
+        ("x", 50, operator.gt, True, operator.sub),
+        ("x", "y", operator.lt, operator.neg),
+        ("x", 50, operator.le, "y", operator.floordiv),
+        ("x", 50, operator.ge, "y", operator.gt, 2, operator.mul),
+        ("x", "y", operator.eq, operator.abs),
+        ("x", 50, operator.gt, "y", operator.and_),
+    ]
+    rows = 1_000
+    columns = {name: column[:rows] for name, column in columns.items()}
+    for forward in programs:
+        program = list(reversed(forward))
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch = execute_batch(program, columns)
+        assert batch is not None, forward
+        assert [
+            None if masked else [repr(np.asarray(value).item())]
+            for value, masked in zip(batch.data, batch.mask)
+        ] == [
+            None if result is None else [repr(value) for value in result]
+            for result in run_rows(program, columns, rows)
+        ], forward
+    print(f"Same results as run() for {len(programs)} programs with comparisons")
@@ -0,0 +1,177 @@
+import contextlib
+import io
+import operator
+import os
+import resource
+import time
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluator import (
+    Profile,
+    compile,
+    execute,
+    execute_many,
+    execute_stream,
+    is_comment,
+    run,
+)
+
+
+def make_program(size):
+    """Build a stack program of roughly `size` items, ready for execute()."""
+    items = ["# Generated benchmark program", 1, 1, operator.add]
+    # Keep the running value small so big-int arithmetic stays out of it
+    steps = [(3, operator.add), (1, operator.mul), (3, operator.sub)]
+    while len(items) < size:
+        items.extend(steps[len(items) % 3])
+    return list(reversed(items))
+
+
+def bench_execute_vs_run(size, repeat=20):
+    program = make_program(size)
+    compiled = compile(program)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert execute(list(program)) == run(compiled)
+        # execute() consumes its program, so copying is part of each replay
+        execute_time = timeit.timeit(lambda: execute(list(program)), number=repeat)
+        run_time = timeit.timeit(lambda: run(compiled), number=repeat)
+        compile_time = timeit.timeit(lambda: compile(program), number=repeat)
+
+    print(
+        f"{size:>9,} items | execute: {execute_time / repeat * 1000:7.2f} ms"
+        f" | run: {run_time / repeat * 1000:7.2f} ms"
+        f" | compile: {compile_time / repeat * 1000:7.2f} ms"
+        f" | speedup: {execute_time / run_time:4.1f}x"
+    )
+
+
+def generate_program(size):
+    """Yield a program of `size` items in source order, one at a time."""
+    yield "# Generated benchmark program"
+    yield 0
+    for _ in range((size - 2) // 2):
+        yield 1
+        yield operator.add
+
+
+def peak_rss(streaming, size):
+    """Evaluate a generated program and return the peak RSS in MiB."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if streaming:
+            execute_stream(generate_program(size))
+        else:
+            execute(list(reversed(tuple(generate_program(size)))))
+    # Linux keeps ru_maxrss across exec(), so it would include the memory
+    # of the parent process; VmHWM is the peak of this process alone
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_streaming_memory(size):
+    # Peak RSS never goes down, so measure each run in a fresh process
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        materialized = executor.submit(peak_rss, False, size).result()
+        streaming = executor.submit(peak_rss, True, size).result()
+    print(
+        f"{size:>11,} items | execute: {materialized:7.1f} MiB"
+        f" | execute_stream: {streaming:7.1f} MiB"
+    )
+
+
+def bench_execute_many(count, size):
+    programs = [make_program(size) for _ in range(count)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        expected = [execute(list(program)) for program in programs]
+        serial_time = time.perf_counter() - start_time
+    print(f"{count:,} programs of {size:,} items | serial: {serial_time:.2f} s")
+
+    for workers in (1, 2, 4, 8):
+        start_time = time.perf_counter()
+        outcomes = execute_many(programs, workers=workers)
+        parallel_time = time.perf_counter() - start_time
+        assert [outcome.result for outcome in outcomes] == expected
+        print(
+            f"{workers} workers: {parallel_time:.2f} s"
+            f" | speedup: {serial_time / parallel_time:4.1f}x"
+        )
+
+
+def execute_without_profile(program):
+    """execute() as it was before it took a profile, as a baseline."""
+    while program:
+        item = program.pop()
+        if not is_comment(item):
+            program.append(item)
+            break
+    else:  # nobreak
+        print("Empty program!")
+        return
+
+    pending = []
+    while program:
+        item = program.pop()
+        if callable(item):
+            try:
+                result = item(*pending)
+            except Exception as e:
+                print(f"Error: {e}")
+                break
+            program.append(result)
+            pending.clear()
+        else:
+            pending.append(item)
+    else:  # nobreak
+        print("Program complete.")
+        return pending
+
+
+def bench_profile_overhead(size, number=10_000, rounds=20):
+    program = make_program(size)
+    profile = Profile()
+    # Every variant copies the program once: execute() consumes its copy,
+    # and Profile.execute() makes its own
+    variants = {
+        "baseline": lambda: execute_without_profile(list(program)),
+        "no profile": lambda: execute(list(program)),
+        "profile=None": lambda: execute(list(program), profile=None),
+        "enabled": lambda: execute(program, profile=profile),
+    }
+
+    # Alternate between the variants, keeping the best round of each, so
+    # that drift in the speed of the machine affects them all alike
+    best = dict.fromkeys(variants, float("inf"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            for name, function in variants.items():
+                duration = timeit.timeit(function, number=number) / number
+                best[name] = min(best[name], duration)
+    baseline = best["baseline"]
+    print(
+        f"{size:>9,} items | baseline: {baseline * 1e6:8.2f} us"
+        f" | no profile: {best['no profile'] / baseline - 1:+6.1%}"
+        f" | profile=None: {best['profile=None'] / baseline - 1:+6.1%}"
+        f" | enabled: {best['enabled'] / baseline:4.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    for size in (10_000, 100_000, 1_000_000):
+        bench_execute_vs_run(size)
+
+    for size in (100_000, 1_000_000, 10_000_000):
+        bench_streaming_memory(size)
+
+    # A disabled profile costs one `is not None` check per program, which
+    # shows most on the smallest programs
+    for size in (7, 100, 10_000):
+        bench_profile_overhead(size, number=20_000 // size + 10)
+
+    print(f"CPUs: {os.cpu_count()}")
+    bench_execute_many(2_000, 5_000)
@@ -0,0 +1,286 @@
+import numbers
+import operator
+
+from evaluator import Compiled, compile, is_comment
+
+# Operators without side effects, which can be called at load time
+PURE = frozenset(
+    {
+        operator.abs,
+        operator.add,
+        operator.and_,
+        operator.concat,
+        operator.eq,
+        operator.floordiv,
+        operator.ge,
+        operator.gt,
+        operator.invert,
+        operator.le,
+        operator.lt,
+        operator.mod,
+        operator.mul,
+        operator.ne,
+        operator.neg,
+        operator.not_,
+        operator.or_,
+        operator.pos,
+        operator.sub,
+        operator.truediv,
+        operator.truth,
+        operator.xor,
+    }
+)
+
+# Associative operators, with the operand types for which regrouping
+# a chain of them gives exactly the same result
+ASSOCIATIVE = {
+    operator.add: (str, bytes, tuple, list),
+    operator.concat: (str, bytes, tuple, list),
+    operator.and_: (int,),
+    operator.or_: (int,),
+    operator.xor: (int,),
+}
+
+
+def is_pure(function):
+    try:
+        return function in PURE
+    except TypeError:  # Unhashable callable
+        return False
+
+
+def associative_types(function):
+    try:
+        return ASSOCIATIVE.get(function, ())
+    except TypeError:  # Unhashable callable
+        return ()
+
+
+def is_immutable(value):
+    if isinstance(value, tuple):
+        return all(map(is_immutable, value))
+    return isinstance(value, (numbers.Number, str, bytes))
+
+
+def fold(compiled):
+    """Fold the leading calls whose operands are all literals."""
+    code = list(compiled.code)
+    tail = compiled.tail
+    while code:
+        function, arguments = code[0]
+        # Operands of other types may have methods with side effects, such
+        # as an __add__ of their own
+        if not is_pure(function) or not all(map(is_immutable, arguments)):
+            break
+        try:
+            result = function(*arguments)
+        except Exception:
+            break  # Leave the error to be reported at run time
+        # A callable result would be called, and a comment-like one
+        # skipped, when it becomes the first item of the program. A mutable
+        # one would be shared by every run of the program, where each run
+        # of the original computes a new one
+        if callable(result) or is_comment(result) or not is_immutable(result):
+            break
+        del code[0]
+        if code:
+            function, arguments = code[0]
+            code[0] = (function, (result, *arguments))
+        else:
+            tail = (result, *tail)
+    return Compiled(code=tuple(code), tail=tail)
+
+
+def result_type(function, operand_types):
+    """Return the builtin type of the result of a call, if it is known.
+
+    Only associative operators on operands which are all of the same
+    builtin type are known to give a result of that type.
+    """
+    types = associative_types(function)
+    if operand_types and operand_types[0] in types:
+        if all(t is operand_types[0] for t in operand_types):
+            return operand_types[0]
+    return None
+
+
+def collapse(compiled):
+    """Merge chains of an associative operator applied to literals.
+
+    For example, the calls in `[1] [2] add [3] add [4] add` become
+    `[1] [2] add [3, 4] add`. A chain is only merged when the value it
+    starts from is known to be of the same builtin type as the literals,
+    as the result of an unknown call may be an ndarray, or an object with
+    its own __add__, for which regrouping changes the result.
+    """
+    code = []
+    # The type of the result of each call in code, or None if unknown
+    result_types = []
+    for function, arguments in compiled.code:
+        operand_types = [type(argument) for argument in arguments]
+        # The first call does not receive a previous result, so it cannot
+        # be part of a chain
+        if code:
+            operand_types.insert(0, result_types[-1])
+            last_function, last_arguments = code[-1]
+            known = result_type(function, operand_types)
+            if (
+                known is not None
+                and len(code) > 1
+                and function is last_function
+                and len(arguments) == len(last_arguments) == 1
+                and result_types[-1] is known
+            ):
+                code[-1] = (function, (function(*last_arguments, *arguments),))
+                continue
+        code.append((function, arguments))
+        result_types.append(result_type(function, operand_types))
+    return Compiled(code=tuple(code), tail=compiled.tail)
+
+
+def decompile(compiled):
+    """Turn a Compiled program back into a stack program for execute()."""
+    items = []
+    for function, arguments in compiled.code:
+        items.extend(arguments)
+        items.append(function)
+    items.extend(compiled.tail)
+    items.reverse()
+    return items
+
+
+def optimize(program):
+    """Optimize a stack program ahead of execution.
+
+    Leading comments are removed, calls to pure operators on literal
+    operands are folded into their results, and chains of the same
+    associative operator are collapsed into a single call.
+
+    Args:
+        program: A stack program in the same form accepted by compile().
+            It is not consumed.
+
+    Returns:
+        A tuple of the optimized stack program, which gives the same
+        results as the original in execute(), and the number of items
+        which were removed.
+    """
+    optimized = decompile(collapse(fold(compile(program))))
+    return optimized, len(program) - len(optimized)
+
+
+if __name__ == "__main__":
+    import contextlib
+    import copy
+    import io
+    import random
+
+    import numpy as np
+
+    from evaluator import execute
+
+    def opaque(*args):
+        """An operator the optimizer knows nothing about."""
+        return args[0] if args else 0
+
+    class Tally:
+        """A value with its own __add__, which reports every call."""
+
+        def __add__(self, other):
+            print(f"Tally + {other!r}")
+            return self
+
+        def __repr__(self):
+            return "Tally()"
+
+    OPERANDS = [
+        -2,
+        -1,
+        0,
+        1,
+        2,
+        3,
+        0.5,
+        -0.0,
+        1e16,
+        "a",
+        "#b",
+        b"c",
+        (1,),
+        [2],
+        # Values for which regrouping additions changes the result
+        np.array([1]),
+        Tally(),
+    ]
+    OPERATORS = [
+        operator.add,
+        operator.sub,
+        operator.mul,
+        operator.truediv,
+        operator.floordiv,
+        operator.mod,
+        operator.and_,
+        operator.or_,
+        operator.xor,
+        operator.neg,
+        operator.concat,
+        operator.iadd,
+        opaque,
+    ]
+
+    def random_program(rng):
+        items = ["# comment"] * rng.randrange(3)
+        for _ in range(rng.randrange(12)):
+            items.extend(rng.choice(OPERANDS) for _ in range(rng.randrange(3)))
+            items.append(rng.choice(OPERATORS))
+        items.extend(rng.choice(OPERANDS) for _ in range(rng.randrange(2)))
+        # Copies, so that programs don't share the mutable operands
+        return copy.deepcopy(list(reversed(items)))
+
+    def outcome(program):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            # Twice, as mutating operators such as iadd may change literals
+            # for the runs after
+            results = [execute(list(program)) for _ in range(2)]
+        # repr() tells apart values which compare equal, such as 0.0 and -0.0
+        return repr(results), output.getvalue()
+
+    # Property: an optimized program behaves exactly like the original
+    rng = random.Random(0)
+    removed = 0
+    # Division by zero with the ndarray operand warns rather than raises
+    with np.errstate(all="ignore"):
+        for _ in range(100_000):
+            program = random_program(rng)
+            # The optimized program would otherwise share the mutable literals
+            # of the original
+            optimized, count = optimize(copy.deepcopy(program))
+            assert outcome(program) == outcome(optimized), program
+            assert count == len(program) - len(optimized) >= 0
+            removed += count
+        # Random programs seldom chain additions onto a value the optimizer
+        # can't know the type of
+        for value in OPERANDS:
+            for operand in OPERANDS:
+                program = [value, opaque] + [operand, operator.add] * 3
+                program.reverse()
+                optimized, _ = optimize(copy.deepcopy(program))
+                assert outcome(program) == outcome(optimized), program
+    print(f"Equivalent on 100,000 random programs, removing {removed:,} items")
+
+    program = list(
+        reversed(
+            (
+                "# A short stack program to add",
+                "# and multiply some constants",
+                5,
+                2,
+                operator.add,
+                3,
+                operator.mul,
+            )
+        )
+    )
+    optimized, removed = optimize(program)
+    print(f"{optimized} ({removed} items removed)")
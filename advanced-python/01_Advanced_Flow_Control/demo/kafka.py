@@ -1,3 +1,6 @@
+from types import MappingProxyType
+
+
 def go_north(position):
     i, j = position
     new_position = (i, j + 1)
@@ -55,21 +58,44 @@ def rabbit_hole(position, alive):
     return (0, 0), alive
 
 
-def play():
+# Built once, and read-only so that play() can safely share them
+LOCATIONS = MappingProxyType(
+    {
+        (0, 0): labyrinth,
+        (1, 0): dark_forest_road,
+        (1, 1): tall_tower,
+        (2, 1): rabbit_hole,
+        (1, 2): lava_pit,
+    }
+)
+
+ACTIONS = MappingProxyType(
+    {
+        "N": go_north,
+        "E": go_east,
+        "S": go_south,
+        "W": go_west,
+        "L": look,
+        "Q": quit,
+    }
+)
+
+
+def play(commands=None):
+    """Play the game.
+
+    Args:
+        commands: An optional iterable of commands, such as a scripted
+            session. Defaults to reading commands with input(). Running
+            out of commands quits the game.
+    """
+    commands = iter(input, None) if commands is None else iter(commands)
     position = (0, 0)
     alive = True
 
     while position:
-        locations = {
-            (0, 0): labyrinth,
-            (1, 0): dark_forest_road,
-            (1, 1): tall_tower,
-            (2, 1): rabbit_hole,
-            (1, 2): lava_pit,
-        }
-
         try:
-            location_action = locations[position]
+            location_action = LOCATIONS[position]
         except KeyError:
             print("There is nothing here.")
         else:
@@ -79,19 +105,10 @@ def play():
             print("You're dead!")
             break
 
-        command = input()
-
-        actions = {
-            "N": go_north,
-            "E": go_east,
-            "S": go_south,
-            "W": go_west,
-            "L": look,
-            "Q": quit,
-        }
+        command = next(commands, "Q")
 
         try:
-            command_action = actions[command]
+            command_action = ACTIONS[command]
         except KeyError:
             print("I don't understand")
         else:
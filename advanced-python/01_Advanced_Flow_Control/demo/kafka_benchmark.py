@@ -0,0 +1,149 @@
+import builtins
+import contextlib
+import itertools
+import time
+import timeit
+import tracemalloc
+
+import kafka
+from kafka import (
+    dark_forest_road,
+    go_east,
+    go_north,
+    go_south,
+    go_west,
+    labyrinth,
+    lava_pit,
+    look,
+    quit,
+    rabbit_hole,
+    tall_tower,
+)
+
+# Walks in a loop between the labyrinth, the road and the tower, so the
+# player never dies and every command is a move
+SCRIPT = ("E", "N", "S", "W")
+
+
+def script(moves):
+    return itertools.islice(itertools.cycle(SCRIPT), moves)
+
+
+def play_rebuilt(commands):
+    """play() as it was, rebuilding its tables on every move.
+
+    Only reading commands from an iterable rather than input() differs.
+    """
+    commands = iter(commands)
+    position = (0, 0)
+    alive = True
+
+    while position:
+        locations = {
+            (0, 0): labyrinth,
+            (1, 0): dark_forest_road,
+            (1, 1): tall_tower,
+            (2, 1): rabbit_hole,
+            (1, 2): lava_pit,
+        }
+
+        try:
+            location_action = locations[position]
+        except KeyError:
+            print("There is nothing here.")
+        else:
+            position, alive = location_action(position, alive)
+
+        if not alive:
+            print("You're dead!")
+            break
+
+        command = next(commands, "Q")
+
+        actions = {
+            "N": go_north,
+            "E": go_east,
+            "S": go_south,
+            "W": go_west,
+            "L": look,
+            "Q": quit,
+        }
+
+        try:
+            command_action = actions[command]
+        except KeyError:
+            print("I don't understand")
+        else:
+            position = command_action(position)
+    else:  # nobreak
+        print("You have chosen to leave the game.")
+
+
+@contextlib.contextmanager
+def silent():
+    """Replace print() with a function doing nothing.
+
+    Writing to a stream, even os.devnull, takes about as long as the rest
+    of a move, and allocates, which would blur the difference between the
+    versions.
+    """
+    print_ = builtins.print
+    builtins.print = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        builtins.print = print_
+
+
+def bench_seconds_per_move(play, moves):
+    with silent():
+        start_time = time.perf_counter()
+        play(script(moves))
+        duration = time.perf_counter() - start_time
+    return duration / moves
+
+
+def measured(commands, samples):
+    """Yield commands, recording the peak memory allocated between them."""
+    for command in commands:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        yield command
+        samples.append(tracemalloc.get_traced_memory()[1] - before)
+
+
+def bench_bytes_per_move(play, moves):
+    samples = []
+    tracemalloc.start()
+    try:
+        with silent():
+            play(measured(script(moves), samples))
+    finally:
+        tracemalloc.stop()
+    return sum(samples) / len(samples)
+
+
+if __name__ == "__main__":
+    versions = {"tables per move": play_rebuilt, "module tables": kafka.play}
+
+    # Alternate between the versions and keep the best of 5 runs of each,
+    # to smooth out noise
+    seconds = {name: float("inf") for name in versions}
+    for _ in range(5):
+        for name, play in versions.items():
+            seconds[name] = min(seconds[name], bench_seconds_per_move(play, 1_000_000))
+
+    for name, play in versions.items():
+        bytes_per_move = bench_bytes_per_move(play, 100_000)
+        print(
+            f"{name:<16} | {1 / seconds[name]:12,.0f} moves/s"
+            f" | {seconds[name] * 1e9:5.0f} ns per move"
+            f" | peak of {bytes_per_move:5.1f} bytes allocated per move"
+        )
+
+    # The tables are read through MappingProxyType, which costs more than
+    # reading a dict
+    table = dict(kafka.ACTIONS)
+    for name, mapping in (("dict", table), ("MappingProxyType", kafka.ACTIONS)):
+        lookup = min(timeit.repeat("mapping['E']", globals=locals(), number=5_000_000))
+        print(f"{name:<16} | {lookup / 5_000_000 * 1e9:5.1f} ns per lookup")
@@ -0,0 +1,153 @@
+from array import array
+
+from kafka import dark_forest_road, labyrinth, lava_pit, rabbit_hole, tall_tower
+from kafka_simulator import Session
+
+# Location actions by their code in a grid, where 0 means nothing is there
+HANDLERS = (None, labyrinth, dark_forest_road, tall_tower, rabbit_hole, lava_pit)
+CODES = {handler: code for code, handler in enumerate(HANDLERS) if handler}
+
+# Commands which move the player, as (dx, dy)
+MOVES = {"N": (0, 1), "E": (1, 0), "S": (0, -1), "W": (-1, 0), "L": (0, 0)}
+
+
+class GridWorld:
+    """A rectangular world storing one small-int location code per cell.
+
+    Positions are packed into a single integer, x + y * width, where x
+    and y are counted from the origin, the (i, j) position of the bottom
+    left cell. Unlike the dict of LOCATIONS, the world is bounded: moves
+    which would leave the grid are ignored.
+    """
+
+    def __init__(self, width, height, origin=(0, 0)):
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self.cells = array("B", bytes(width * height))
+
+    def pack(self, position):
+        i, j = position
+        x = i - self.origin[0]
+        y = j - self.origin[1]
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"Position {position!r} is outside the grid")
+        return x + y * self.width
+
+    def unpack(self, packed):
+        y, x = divmod(packed, self.width)
+        return (x + self.origin[0], y + self.origin[1])
+
+    def __getitem__(self, position):
+        return HANDLERS[self.cells[self.pack(position)]]
+
+    def __setitem__(self, position, location_action):
+        self.cells[self.pack(position)] = CODES[location_action]
+
+    @classmethod
+    def from_locations(cls, locations, width, height, origin=(0, 0)):
+        """Build a grid from a dict of locations such as LOCATIONS."""
+        grid = cls(width, height, origin)
+        for position, location_action in locations.items():
+            grid[position] = location_action
+        return grid
+
+    def locations(self):
+        """Return the equivalent dict of locations."""
+        return {
+            self.unpack(packed): HANDLERS[code]
+            for packed, code in enumerate(self.cells)
+            if code
+        }
+
+
+def run_grid_session(grid, commands):
+    """Run one session of the game over a GridWorld.
+
+    Follows the same rules as kafka_simulator.run_session(), but the
+    position is a packed integer so moving allocates nothing.
+    """
+    cells = grid.cells
+    width = grid.width
+    size = len(cells)
+    moves = {command: (dx, dy, dx + dy * width) for command, (dx, dy) in MOVES.items()}
+    commands = iter(commands)
+    position = grid.pack((0, 0))
+    alive = True
+    steps = 0
+
+    while True:
+        code = cells[position]
+        if code:
+            position, alive = HANDLERS[code](position, alive)
+            # Location actions which move the player return an (i, j) tuple
+            if type(position) is tuple:
+                position = grid.pack(position)
+        if not alive:
+            break
+
+        command = next(commands, None)
+        if command is None:
+            break  # Out of commands
+        steps += 1
+
+        try:
+            dx, dy, delta = moves[command]
+        except KeyError:
+            if command == "Q":
+                break
+        else:
+            if 0 <= position % width + dx < width and 0 <= position + delta < size:
+                position += delta
+
+    return Session(grid.unpack(position), alive, steps)
+
+
+if __name__ == "__main__":
+    import contextlib
+    import random
+    import time
+    import tracemalloc
+
+    from kafka_simulator import WORLD, NullWriter, World, run_session
+
+    def measure(build):
+        tracemalloc.start()
+        try:
+            world = build()
+            return world, tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    rng = random.Random(0)
+    side = 1_000
+    codes = rng.choices(range(len(HANDLERS)), weights=[40, 20, 20, 17, 2, 1], k=side**2)
+
+    def build_grid():
+        # The start position (0, 0) is in the middle of the grid
+        grid = GridWorld(side, side, origin=(-side // 2, -side // 2))
+        grid.cells = array("B", codes)
+        return grid
+
+    grid, grid_bytes = measure(build_grid)
+    locations, dict_bytes = measure(grid.locations)
+    world = World(locations, WORLD.actions)
+    print(f"{side**2:,} cells | dict: {dict_bytes / 2**20:6.1f} MiB")
+    print(f"{side**2:,} cells | grid: {grid_bytes / 2**20:6.1f} MiB")
+
+    # Walks shorter than half the side never leave the grid, so both
+    # representations must agree exactly
+    command_streams = [rng.choices("NESWLX", k=side // 2 - 1) for _ in range(10_000)]
+    moves = sum(map(len, command_streams))
+    with contextlib.redirect_stdout(NullWriter()):
+        start_time = time.perf_counter()
+        expected = [run_session(world, commands) for commands in command_streams]
+        dict_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        sessions = [run_grid_session(grid, commands) for commands in command_streams]
+        grid_time = time.perf_counter() - start_time
+
+    assert sessions == expected
+    print(f"dict: {moves / dict_time:12,.0f} moves/s")
+    print(f"grid: {moves / grid_time:12,.0f} moves/s")
@@ -0,0 +1,112 @@
+import contextlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
+
+from kafka import ACTIONS, LOCATIONS
+
+World = namedtuple("World", ["locations", "actions"])
+Session = namedtuple("Session", ["position", "alive", "steps"])
+
+WORLD = World(LOCATIONS, ACTIONS)
+
+
+class NullWriter:
+    """A text stream which discards everything written to it."""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def run_session(world, commands):
+    """Run one session of the game, as play() would, from scripted commands.
+
+    Only the location actions of the world print anything; see
+    simulate_chunk() for running sessions silently.
+
+    Returns:
+        A Session with the last position of the player, whether they are
+        still alive, and the number of commands they gave.
+    """
+    locations, actions = world
+    commands = iter(commands)
+    position = (0, 0)
+    alive = True
+    steps = 0
+
+    while True:
+        location_action = locations.get(position)
+        if location_action is not None:
+            position, alive = location_action(position, alive)
+        if not alive:
+            break
+
+        command = next(commands, None)
+        if command is None:
+            break  # Out of commands
+        steps += 1
+
+        command_action = actions.get(command)
+        if command_action is not None:
+            new_position = command_action(position)
+            if new_position is None:
+                break  # Quit
+            position = new_position
+
+    return Session(position, alive, steps)
+
+
+def simulate_chunk(world, chunk):
+    # Location actions describe themselves with print()
+    with contextlib.redirect_stdout(NullWriter()):
+        return [run_session(world, commands) for commands in chunk]
+
+
+def simulate(world, command_streams, workers=None, chunksize=256):
+    """Run many independent sessions of the game in worker processes.
+
+    Args:
+        world: A World of location and command actions, such as WORLD.
+        command_streams: An iterable with an iterable of commands for
+            each session.
+        workers: The number of worker processes, which defaults to the
+            number of CPUs.
+        chunksize: The number of sessions sent to a worker at a time.
+
+    Returns:
+        A list of Session results, in the same order as command_streams.
+    """
+    # Mapping proxies cannot be pickled, so send plain dicts to the workers
+    world = World(dict(world.locations), dict(world.actions))
+    streams = iter(command_streams)
+    chunks = iter(lambda: [list(s) for s in islice(streams, chunksize)], [])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(simulate_chunk, repeat(world), chunks)
+        return list(chain.from_iterable(results))
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import time
+
+    rng = random.Random(0)
+    command_streams = [
+        rng.choices("NESWLX", k=rng.randrange(1_000)) for _ in range(10_000)
+    ]
+
+    for workers in sorted({1, os.cpu_count()}):
+        start_time = time.perf_counter()
+        sessions = simulate(WORLD, command_streams, workers=workers)
+        duration = time.perf_counter() - start_time
+        print(
+            f"{workers} workers: {len(sessions):,} sessions"
+            f" in {round(duration, 2)} seconds"
+        )
+
+    alive = sum(session.alive for session in sessions)
+    steps = sum(session.steps for session in sessions)
+    print(f"Alive: {alive:,} | steps: {steps:,}")
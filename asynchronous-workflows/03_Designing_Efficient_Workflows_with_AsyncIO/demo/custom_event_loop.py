@@ -1,8 +1,48 @@
 import asyncio
+import bisect
+import functools
+import importlib
+import io
+import logging
+import os
+import sys
+import threading
 import time
+import traceback
 
+# Event loops to build on, as "module:class"
+BASE_LOOPS = {
+    "selector": "asyncio:SelectorEventLoop",
+    "uvloop": "uvloop:Loop",
+}
 
-class TimingEventLoop(asyncio.SelectorEventLoop):
+
+def get_base_loop(name="selector"):
+    """Return the event loop class called name.
+
+    "auto" is uvloop when it is installed, and selector otherwise. Names
+    which aren't in BASE_LOOPS are taken as "module:class", to build on
+    other loops, such as one based on io_uring.
+    """
+    if name == "auto":
+        try:
+            return get_base_loop("uvloop")
+        except ImportError:
+            return get_base_loop("selector")
+    module, _, cls = BASE_LOOPS.get(name, name).partition(":")
+    if not cls:
+        raise ValueError(f"Unknown event loop {name!r}, expected module:class")
+    return getattr(importlib.import_module(module), cls)
+
+
+@functools.cache
+def with_base(mixin, base):
+    """Return a class adding mixin to the event loop class base."""
+    name = mixin.__name__.removesuffix("LoopMixin") + base.__name__.lstrip("_")
+    return type(name, (mixin, base), {})
+
+
+class TimingLoopMixin:
     def run_until_complete(self, future):
         start_time = time.perf_counter()
         result = super().run_until_complete(future)
@@ -11,6 +51,283 @@ class TimingEventLoop(asyncio.SelectorEventLoop):
         return result
 
 
+class TimingEventLoop(TimingLoopMixin, asyncio.SelectorEventLoop):
+    pass
+
+
 class TimingEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    def __init__(self, loop="selector"):
+        super().__init__()
+        self.loop_class = with_base(TimingLoopMixin, get_base_loop(loop))
+
+    def new_event_loop(self):
+        return self.loop_class()
+
+
+# Upper bounds, in seconds, of the buckets of histograms of durations
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, float("inf"))
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Counts of values in buckets, along with their sum, as in Prometheus."""
+
+    __slots__ = ("buckets", "counts", "total")
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def count(self):
+        return sum(self.counts)
+
+
+class HistogramSink:
+    """Keeps the latest loop metrics in memory."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.gauges = {}
+
+    def write(self, histograms, gauges):
+        self.histograms = histograms
+        self.gauges.update(gauges)
+
+    def summary(self):
+        """Return the count, mean and highest bucket of each metric."""
+        lines = []
+        for name, histogram in sorted(self.histograms.items()):
+            count = histogram.count()
+            if not count:
+                continue
+            highest = max(i for i, n in enumerate(histogram.counts) if n)
+            lines.append(
+                f"{name}: {count:,} | mean: {histogram.total / count * 1e6:,.1f} µs"
+                f" | max: <= {histogram.buckets[highest]} s"
+            )
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+
+class PrometheusFileSink:
+    """Writes loop metrics to a file in the Prometheus text format.
+
+    The file is rewritten on every write(), for node_exporter's textfile
+    collector or any other scraper to pick up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, histograms, gauges):
+        lines = []
+        for name, histogram in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum {histogram.total}")
+            lines.append(f"{name}_count {cumulative}")
+        for name, value in sorted(gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        # Write a new file and rename it, so readers never see half of one
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.path)
+
+
+class InstrumentedLoopMixin:
+    """Adds instrumentation to an event loop class.
+
+    Every callback scheduled through call_soon(), call_later(), call_at()
+    or call_soon_threadsafe() is timed, which includes every step of every
+    task. Callbacks running longer than slow_callback_duration are logged
+    with the stack they were blocked in, which a watchdog thread captures
+    while they run. Every sample_interval seconds, the loop
+    records how late the sample itself ran (the loop lag), how many
+    callbacks are ready to run, and how many tasks are alive, then writes
+    its metrics to sink. A sink is any object with a write(histograms,
+    gauges) method.
+    """
+
+    def __init__(
+        self,
+        *args,
+        sink=None,
+        slow_callback_duration=0.1,
+        sample_interval=1.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.sink = HistogramSink() if sink is None else sink
+        self.slow_callback_duration = slow_callback_duration
+        self.sample_interval = sample_interval
+        self.histograms = {
+            "loop_callback_seconds": Histogram(),
+            "loop_slow_callback_seconds": Histogram(),
+            "loop_lag_seconds": Histogram(),
+        }
+        self.gauges = {}
+        # When the running callback started, and the stack the watchdog
+        # captured in the last slow one, with when it started
+        self._callback_start = None
+        self._slow_stack = (None, None)
+        self._schedule_sample()
+
+    def _timed(self, callback):
+        # asyncio's call_later() goes through call_at(), and uvloop's
+        # call_at() through call_later(), so callbacks may come back here
+        if getattr(callback, "timed_by", None) is self:
+            return callback
+        # This runs around every callback, so everything it needs is local
+        perf_counter = time.perf_counter
+        bisect_left = bisect.bisect_left
+        histogram = self.histograms["loop_callback_seconds"]
+        buckets, counts = histogram.buckets, histogram.counts
+        slow_callback_duration = self.slow_callback_duration
+
+        def timed(*args):
+            start = self._callback_start = perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                self._callback_start = None
+                duration = perf_counter() - start
+                counts[bisect_left(buckets, duration)] += 1
+                histogram.total += duration
+                if duration >= slow_callback_duration:
+                    self._slow_callback(callback, duration, start)
+
+        timed.timed_by = self
+        return timed
+
+    def _slow_callback(self, callback, duration, start):
+        self.histograms["loop_slow_callback_seconds"].add(duration)
+        captured, stack = self._slow_stack
+        # Task steps and wakeups are methods of their task
+        task = getattr(callback, "__self__", None)
+        if captured == start:
+            owner = task if isinstance(task, asyncio.Task) else callback
+            where = f"{owner!r} blocked in:\n{stack}"
+        # The watchdog missed callbacks which returned soon after going over
+        # slow_callback_duration. Their task is now suspended at its next
+        # await, past the code which blocked, and one which finished has
+        # no stack left to show.
+        elif isinstance(task, asyncio.Task) and not task.done():
+            where = io.StringIO()
+            where.write("not caught while blocked, now at its next await:\n")
+            task.print_stack(file=where)
+            where = where.getvalue()
+        else:
+            where = f"{callback!r} not caught while blocked\n"
+        logger.warning("Slow callback took %.3f s: %s", duration, where)
+
+    def run_forever(self):
+        stop = threading.Event()
+        watchdog = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(), stop),
+            name="loop-watchdog",
+            daemon=True,
+        )
+        watchdog.start()
+        try:
+            return super().run_forever()
+        finally:
+            stop.set()
+            watchdog.join()
+
+    def _watch(self, thread, stop):
+        """Capture the stack of the loop thread while a callback is slow.
+
+        Runs in its own thread, checking a few times per
+        slow_callback_duration, so the stack shows the code which blocked
+        the loop rather than where the callback went on to.
+        """
+        while not stop.wait(self.slow_callback_duration / 4):
+            start = self._callback_start
+            if start is None or start == self._slow_stack[0]:
+                continue
+            if time.perf_counter() - start < self.slow_callback_duration:
+                continue
+            top = sys._current_frames().get(thread)
+            if top is None:
+                continue
+            # Only keep the frames of the callback, below timed()
+            frames = []
+            for frame, line in traceback.walk_stack(top):
+                code = frame.f_code
+                if code.co_name == "timed" and code.co_filename == __file__:
+                    break
+                frames.append((frame, line))
+            stack = "".join(traceback.StackSummary.extract(reversed(frames)).format())
+            # The callback may have returned while the stack was taken
+            if self._callback_start == start:
+                self._slow_stack = (start, stack)
+
+    def call_soon(self, callback, *args, context=None):
+        return super().call_soon(self._timed(callback), *args, context=context)
+
+    def call_later(self, delay, callback, *args, context=None):
+        return super().call_later(delay, self._timed(callback), *args, context=context)
+
+    def call_at(self, when, callback, *args, context=None):
+        return super().call_at(when, self._timed(callback), *args, context=context)
+
+    def call_soon_threadsafe(self, callback, *args, context=None):
+        return super().call_soon_threadsafe(
+            self._timed(callback), *args, context=context
+        )
+
+    def close(self):
+        # Write what was recorded since the last sample
+        self.sink.write(self.histograms, self.gauges)
+        super().close()
+
+    def _schedule_sample(self):
+        when = self.time() + self.sample_interval
+        # Samples aren't callbacks of the program, so they aren't timed
+        sample = functools.partial(self._sample, when)
+        sample.timed_by = self
+        super().call_at(when, sample)
+
+    def _sample(self, scheduled):
+        self.histograms["loop_lag_seconds"].add(self.time() - scheduled)
+        # Only the loops of asyncio itself have a ready queue to look at;
+        # uvloop keeps its own out of reach
+        ready = getattr(self, "_ready", None)
+        if ready is not None:
+            self.gauges["loop_ready_callbacks"] = len(ready)
+        self.gauges["loop_tasks"] = len(asyncio.all_tasks(self))
+        self.sink.write(self.histograms, self.gauges)
+        self._schedule_sample()
+
+
+class InstrumentedEventLoop(InstrumentedLoopMixin, asyncio.SelectorEventLoop):
+    pass
+
+
+class InstrumentedEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    """Creates instrumented event loops built on the loop called loop.
+
+    Other keyword arguments are passed on to InstrumentedLoopMixin.
+    """
+
+    def __init__(self, loop="selector", **options):
+        super().__init__()
+        self.loop_class = with_base(InstrumentedLoopMixin, get_base_loop(loop))
+        self.options = options
+
     def new_event_loop(self):
-        return TimingEventLoop()
+        return self.loop_class(**self.options)
@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import graphlib
+import weakref
+
+
+class Step:
+    """A step of a workflow.
+
+    function is a coroutine function, called with the results of the
+    steps, or the inputs of the workflow, named in requires, as keyword
+    arguments. Each attempt is cancelled after timeout seconds, and failed
+    attempts are retried up to retries times, after retry_delay seconds,
+    doubled for every retry. At most limit calls of function run at once,
+    across every run of the workflow on the same event loop.
+    """
+
+    def __init__(
+        self,
+        name,
+        function,
+        requires=(),
+        timeout=None,
+        retries=0,
+        retry_delay=0.1,
+        limit=None,
+    ):
+        self.name = name
+        self.function = function
+        self.requires = tuple(requires)
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.limit = limit
+        # A semaphore only works on one event loop, so each running loop
+        # gets its own
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    def limiter(self):
+        """Return the context manager which enforces limit on this loop."""
+        if not self.limit:
+            return contextlib.nullcontext()
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+
+class StepError(Exception):
+    """A step failed on every attempt; the last error is the cause."""
+
+    def __init__(self, step, attempts):
+        super().__init__(f"Step {step!r} failed after {attempts} attempt(s)")
+        self.step = step
+        self.attempts = attempts
+
+
+class WorkflowRun:
+    """The results of a run of a workflow, and when each step ran."""
+
+    def __init__(self, workflow):
+        self.workflow = workflow
+        self.results = {}
+        # Loop times at which each step had its inputs, started and finished
+        self.timings = {}
+        self.attempts = {}
+
+    def duration(self):
+        return max(t[2] for t in self.timings.values()) - min(
+            t[0] for t in self.timings.values()
+        )
+
+    def critical_path(self):
+        """Return the names of the steps the run waited on, in order.
+
+        The path ends with the step which finished last, and each step is
+        preceded by its dependency which finished last.
+        """
+        steps = self.workflow.steps
+        name = max(self.timings, key=lambda name: self.timings[name][2])
+        path = [name]
+        while dependencies := [r for r in steps[name].requires if r in steps]:
+            name = max(dependencies, key=lambda name: self.timings[name][2])
+            path.append(name)
+        return path[::-1]
+
+    def report(self):
+        lines = []
+        for name in self.critical_path():
+            ready, started, finished = self.timings[name]
+            lines.append(
+                f"{name:<16} | waited: {started - ready:7.3f} s"
+                f" | ran: {finished - started:7.3f} s"
+                f" | attempts: {self.attempts[name]}"
+            )
+        lines.append(f"{'critical path':<16} | {self.duration():.3f} s")
+        return "\n".join(lines)
+
+
+class Workflow:
+    """A graph of steps, each run as soon as the steps it requires are done.
+
+    Names in the requires of steps which aren't steps themselves are the
+    inputs of the workflow, given to run() as keyword arguments.
+    """
+
+    def __init__(self, steps):
+        if not steps:
+            raise ValueError("A workflow needs at least one step")
+        self.steps = {step.name: step for step in steps}
+        if len(self.steps) != len(steps):
+            raise ValueError("Steps must have distinct names")
+        graph = {
+            step.name: [name for name in step.requires if name in self.steps]
+            for step in steps
+        }
+        # Raises graphlib.CycleError, a ValueError, if steps depend on
+        # each other
+        order = list(graphlib.TopologicalSorter(graph).static_order())
+        self.roots = [self.steps[name] for name in order if not graph[name]]
+        self.dependents = {name: [] for name in order}
+        for name in order:
+            for required in graph[name]:
+                self.dependents[required].append(self.steps[name])
+        self.waiting = {name: len(required) for name, required in graph.items()}
+        self.inputs = {
+            name for step in steps for name in step.requires if name not in self.steps
+        }
+
+    async def run(self, **inputs):
+        """Run every step, and return the WorkflowRun.
+
+        If a step fails, the steps still running are cancelled, and its
+        StepError is raised.
+        """
+        missing = self.inputs - inputs.keys()
+        if missing:
+            raise TypeError(f"Missing workflow inputs: {', '.join(sorted(missing))}")
+
+        run = WorkflowRun(self)
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        # The inputs, and the results of the steps done so far
+        values = dict(inputs)
+        # How many of the steps they require each step is waiting for
+        waiting = dict(self.waiting)
+        tasks = []
+
+        async def run_from(step):
+            # When a step is done, the first of the steps it made ready
+            # runs next in the same task, rather than in a new one
+            try:
+                while step is not None:
+                    values[step.name] = await self._run_step(step, values, run)
+                    dependents = self.dependents[step.name]
+                    step = None
+                    for dependent in dependents:
+                        waiting[dependent.name] -= 1
+                        if waiting[dependent.name]:
+                            continue
+                        if step is None:
+                            step = dependent
+                        else:
+                            tasks.append(loop.create_task(run_from(dependent)))
+                if len(run.results) == len(self.steps) and not done.done():
+                    done.set_result(run)
+            except Exception as error:
+                if not done.done():
+                    done.set_exception(error)
+
+        for step in self.roots:
+            tasks.append(loop.create_task(run_from(step)))
+        try:
+            return await done
+        finally:
+            # Only steps still running after a failure, or when the run is
+            # cancelled, are cancelled
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_step(self, step, values, run):
+        arguments = {name: values[name] for name in step.requires}
+        loop = asyncio.get_running_loop()
+        ready = loop.time()
+        started = None
+        for attempt in range(step.retries + 1):
+            if attempt:
+                await asyncio.sleep(step.retry_delay * 2 ** (attempt - 1))
+            try:
+                # The limit isn't held while waiting to retry
+                async with step.limiter():
+                    if started is None:
+                        started = loop.time()
+                    async with asyncio.timeout(step.timeout):
+                        result = await step.function(**arguments)
+            except Exception as error:
+                last_error = error
+                continue
+            run.results[step.name] = result
+            run.timings[step.name] = (ready, started, loop.time())
+            run.attempts[step.name] = attempt + 1
+            return result
+        raise StepError(step.name, step.retries + 1) from last_error
@@ -0,0 +1,73 @@
+import asyncio
+
+
+class DataLoader:
+    """Batches and caches lookups by key.
+
+    load() calls made in the same iteration of the event loop are grouped
+    into calls of batch_load(keys), with up to max_batch_size distinct
+    keys, which must return their values in the same order. Each key is
+    looked up once for the lifetime of the loader, so that a loader is
+    meant to live as long as one scope, such as a request, whose lookups
+    may share results.
+    """
+
+    def __init__(self, batch_load, max_batch_size=None):
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        # The future of the value of each key loaded so far
+        self.futures = {}
+        # Keys to look up in the next batches
+        self.queue = []
+        self.batches = 0
+        self.tasks = set()
+
+    def load(self, key):
+        """Return a future of the value of key."""
+        future = self.futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.futures[key] = loop.create_future()
+            future.add_done_callback(lambda future: self._cancelled(key, future))
+            if not self.queue:
+                # After the callbacks ready to run, which may load more
+                loop.call_soon(self._dispatch)
+            self.queue.append(key)
+        # Don't let one cancelled caller cancel the value for the others
+        return asyncio.shield(future)
+
+    def _cancelled(self, key, future):
+        # A cancelled future isn't cached, so that the next load() tries again
+        if future.cancelled() and self.futures.get(key) is future:
+            del self.futures[key]
+
+    def _dispatch(self):
+        keys, self.queue = self.queue, []
+        size = self.max_batch_size or len(keys)
+        for start in range(0, len(keys), size):
+            batch = {key: self.futures[key] for key in keys[start : start + size]}
+            task = asyncio.create_task(self._load_batch(batch))
+            # Keep a reference, or the task may be garbage collected
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _load_batch(self, futures):
+        self.batches += 1
+        keys = list(futures)
+        try:
+            values = await self.batch_load(keys)
+            if len(values) != len(keys):
+                raise ValueError(
+                    f"batch_load returned {len(values)} values for {len(keys)} keys"
+                )
+        except Exception as error:
+            for key, future in futures.items():
+                # Failures aren't cached, so that the next load() tries again
+                if self.futures.get(key) is future:
+                    del self.futures[key]
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, value in zip(futures.values(), values):
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,127 @@
+import asyncio
+import random
+import statistics
+import time
+
+from workflow import OrderScope, make_order
+
+CUSTOMERS = 5_000
+PRODUCTS = 1_000
+PAYMENT_DELAY = 0.01
+
+
+class Backend:
+    """Stands in for the services behind the customer and product lookups.
+
+    A call takes latency seconds, plus per_key seconds for each key it
+    looks up, and at most connections calls are served at once.
+    """
+
+    def __init__(self, latency=0.05, per_key=0.00001, connections=100):
+        self.latency = latency
+        self.per_key = per_key
+        self.connections = asyncio.Semaphore(connections)
+        self.calls = 0
+        self.keys = 0
+
+    async def fetch(self, keys):
+        self.calls += 1
+        self.keys += len(keys)
+        async with self.connections:
+            await asyncio.sleep(self.latency + self.per_key * len(keys))
+
+    async def get_customers(self, customer_ids):
+        await self.fetch(customer_ids)
+        return [{"id": i, "name": f"Customer {i}"} for i in customer_ids]
+
+    async def get_products(self, product_ids):
+        await self.fetch(product_ids)
+        return [{"id": i, "name": f"Product {i}", "price": 99.99} for i in product_ids]
+
+    async def get_customer(self, customer_id):
+        return (await self.get_customers([customer_id]))[0]
+
+    async def get_product(self, product_id):
+        return (await self.get_products([product_id]))[0]
+
+
+async def process_payment(order):
+    await asyncio.sleep(PAYMENT_DELAY)
+
+
+async def process_order(backend, customer_id, product_id):
+    """process_order() of workflow.py, with a lookup per order."""
+    async with asyncio.TaskGroup() as tg:
+        customer_task = tg.create_task(backend.get_customer(customer_id))
+        product_task = tg.create_task(backend.get_product(product_id))
+    await process_payment(
+        await make_order(customer_task.result(), product_task.result())
+    )
+
+
+async def process_order_batched(customer_id, product_id, scope):
+    """process_order_batched() of workflow.py, without the prints."""
+    customer, product = await asyncio.gather(
+        scope.customers.load(customer_id), scope.products.load(product_id)
+    )
+    await process_payment(await make_order(customer, product))
+
+
+async def timed(order):
+    start_time = time.perf_counter()
+    await order
+    return time.perf_counter() - start_time
+
+
+async def bench(label, orders, scope_size=None, max_batch_size=None):
+    """Process orders, in scopes of scope_size orders if given."""
+    backend = Backend()
+    if scope_size is None:
+        coroutines = [process_order(backend, *order) for order in orders]
+    else:
+        coroutines = []
+        for start in range(0, len(orders), scope_size):
+            scope = OrderScope(backend.get_customers, backend.get_products)
+            scope.customers.max_batch_size = max_batch_size
+            scope.products.max_batch_size = max_batch_size
+            coroutines.extend(
+                process_order_batched(*order, scope)
+                for order in orders[start : start + scope_size]
+            )
+
+    start_time = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(timed(c) for c in coroutines)))
+    duration = time.perf_counter() - start_time
+    print(
+        f"{label:<26} | {backend.calls:6,} calls | {backend.keys:6,} keys"
+        f" | {duration:6.3f} s | p50: {statistics.median(latencies):6.3f} s"
+        f" | p99: {latencies[int(len(latencies) * 0.99)]:6.3f} s"
+    )
+
+
+async def main(orders):
+    await bench("a lookup per order", orders)
+    await bench("scope per order", orders, scope_size=1)
+    await bench("scope per 100 orders", orders, scope_size=100)
+    await bench("one scope", orders, scope_size=len(orders))
+    await bench("one scope, batches of 100", orders, len(orders), max_batch_size=100)
+
+
+if __name__ == "__main__":
+    # Ids with a Zipf-like skew: a few customers and products take most of
+    # the orders
+    rng = random.Random(0)
+    customer_ids = rng.choices(
+        range(CUSTOMERS),
+        weights=[1 / rank for rank in range(1, CUSTOMERS + 1)],
+        k=10_000,
+    )
+    product_ids = rng.choices(
+        range(PRODUCTS), weights=[1 / rank for rank in range(1, PRODUCTS + 1)], k=10_000
+    )
+    orders = list(zip(customer_ids, product_ids))
+    print(
+        f"{len(orders):,} orders | {len(set(customer_ids)):,} customers"
+        f" | {len(set(product_ids)):,} products"
+    )
+    asyncio.run(main(orders))
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+from custom_event_loop import (
+    BASE_LOOPS,
+    InstrumentedLoopMixin,
+    get_base_loop,
+    with_base,
+)
+
+DEMO_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_ADDRESS = ("localhost", 8080)
+
+
+class LoopPolicy(asyncio.DefaultEventLoopPolicy):
+    """Creates event loops built on loop, instrumented or not."""
+
+    def __init__(self, loop, instrumented):
+        super().__init__()
+        self.loop_class = get_base_loop(loop)
+        if instrumented:
+            self.loop_class = with_base(InstrumentedLoopMixin, self.loop_class)
+
+    def new_event_loop(self):
+        return self.loop_class()
+
+
+def available_loops(names):
+    """Return the names of the loops which can be imported."""
+    available = []
+    for name in names:
+        try:
+            get_base_loop(name)
+        except ImportError as error:
+            print(f"{name}: not available ({error})")
+        else:
+            available.append(name)
+    return available
+
+
+async def step(steps):
+    for _ in range(steps):
+        await asyncio.sleep(0)
+
+
+async def workload(tasks, steps):
+    # Each await of sleep(0) is one call_soon() of a task step
+    await asyncio.gather(*(step(steps) for _ in range(tasks)))
+
+
+def run(policy, tasks, steps):
+    loop = policy.new_event_loop()
+    try:
+        start_time = time.perf_counter()
+        loop.run_until_complete(workload(tasks, steps))
+        return time.perf_counter() - start_time
+    finally:
+        loop.close()
+
+
+def run_script(script, loop, instrumented, **kwargs):
+    """Start a demo script with the event loop policy for loop.
+
+    Once the script finishes, the process prints how long it ran for.
+    """
+    # aiohttp is imported ahead, so that the time doesn't include it
+    code = (
+        "import asyncio, runpy, time, aiohttp, event_loop_benchmark as b;"
+        f" asyncio.set_event_loop_policy(b.LoopPolicy({loop!r}, {instrumented}));"
+        " start_time = time.perf_counter();"
+        f" runpy.run_path({script!r}, run_name='__main__');"
+        " print(f'Elapsed: {time.perf_counter() - start_time}')"
+    )
+    return subprocess.Popen([sys.executable, "-c", code], cwd=DEMO_DIR, **kwargs)
+
+
+def run_http(loop, instrumented):
+    """Run client_aiohttp.py against aiohttp_server.py, both on loop.
+
+    Returns the seconds the client ran for.
+    """
+    server = run_script(
+        "aiohttp_server.py", loop, instrumented, stdout=subprocess.DEVNULL
+    )
+    try:
+        # Wait until the server accepts connections
+        for _ in range(100):
+            try:
+                socket.create_connection(SERVER_ADDRESS).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f"aiohttp_server.py did not start on {SERVER_ADDRESS}")
+        client = run_script(
+            "client_aiohttp.py", loop, instrumented, stdout=subprocess.PIPE, text=True
+        )
+        output, _ = client.communicate()
+    finally:
+        server.terminate()
+        server.wait()
+    return float(re.search(r"Elapsed: ([\d.]+)", output).group(1))
+
+
+def report(durations, count, unit):
+    baseline = durations[next(iter(durations))]
+    for name, duration in durations.items():
+        print(
+            f"{name:<24} | {count / duration:10,.0f} {unit}/s"
+            f" | vs {next(iter(durations))}: {baseline / duration - 1:+7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    # Other loops, such as one based on io_uring, can be given as module:class
+    loops = available_loops(list(BASE_LOOPS) + sys.argv[1:])
+    configs = [(loop, instrumented) for loop in loops for instrumented in (False, True)]
+
+    def label(loop, instrumented):
+        return f"{loop}, instrumented" if instrumented else loop
+
+    tasks, steps = 1_000, 500
+    print(f"{tasks:,} tasks of {steps:,} steps")
+    # Alternate between the loops, and keep the best of 5 runs of each,
+    # to smooth out noise
+    durations = {label(*config): float("inf") for config in configs}
+    for _ in range(5):
+        for config in configs:
+            policy = LoopPolicy(*config)
+            durations[label(*config)] = min(
+                durations[label(*config)], run(policy, tasks, steps)
+            )
+    report(durations, tasks * steps, "callbacks")
+
+    # client_aiohttp.py fetches 2,000 names from aiohttp_server.py, with
+    # both running on the same loop
+    print("client_aiohttp.py against aiohttp_server.py")
+    durations = {label(*config): float("inf") for config in configs}
+    for _ in range(5):
+        for config in configs:
+            durations[label(*config)] = min(
+                durations[label(*config)], run_http(*config)
+            )
+    report(durations, 2_000, "requests")
@@ -1,5 +1,7 @@
 import asyncio
 from custom_event_loop import TimingEventLoopPolicy
+from dag_workflow import Step, Workflow
+from data_loader import DataLoader
 
 
 async def get_customer(customer_id):
@@ -16,6 +18,26 @@ async def get_product(product_id):
     return {"id": product_id, "name": f"Product {product_id}", "price": 99.99}
 
 
+async def get_customers(customer_ids):
+    print(f"Fetching customers {', '.join(customer_ids)}...")
+    await asyncio.sleep(3)
+    print(f"Data of {len(customer_ids)} customers received")
+    return [
+        {"id": customer_id, "name": f"Customer {customer_id}"}
+        for customer_id in customer_ids
+    ]
+
+
+async def get_products(product_ids):
+    print(f"Fetching products {', '.join(product_ids)}...")
+    await asyncio.sleep(2)
+    print(f"Data of {len(product_ids)} products received")
+    return [
+        {"id": product_id, "name": f"Product {product_id}", "price": 99.99}
+        for product_id in product_ids
+    ]
+
+
 async def process_payment(order):
     print(
         f"Payment ${order['total']}: {order['customer_name']} {order['product_name']}"
@@ -42,6 +64,52 @@ async def process_order(customer_id, product_id):
     await process_payment(order)
 
 
+async def make_order(customer, product):
+    return {
+        "order_id": "0-1234",
+        "customer_name": customer["name"],
+        "product_name": product["name"],
+        "total": product["price"],
+    }
+
+
+# process_order() as a workflow: each step names the steps, or inputs, it
+# requires, and runs as soon as they are done
+ORDER_WORKFLOW = Workflow(
+    [
+        Step("customer", get_customer, requires=["customer_id"], timeout=5, retries=2),
+        Step("product", get_product, requires=["product_id"], timeout=5, retries=2),
+        Step("order", make_order, requires=["customer", "product"]),
+        Step("payment", process_payment, requires=["order"], timeout=5, limit=100),
+    ]
+)
+
+
+class OrderScope:
+    """The lookups shared by orders processed together, as in one request.
+
+    Customers and products looked up in the same iteration of the event
+    loop are fetched in one call, and each of them only once.
+    """
+
+    def __init__(self, get_customers=get_customers, get_products=get_products):
+        self.customers = DataLoader(get_customers)
+        self.products = DataLoader(get_products)
+
+
+async def process_order_batched(customer_id, product_id, scope):
+    customer, product = await asyncio.gather(
+        scope.customers.load(customer_id), scope.products.load(product_id)
+    )
+    await process_payment(await make_order(customer, product))
+
+
+async def process_orders(orders):
+    """Process (customer_id, product_id) orders together, in one scope."""
+    scope = OrderScope()
+    await asyncio.gather(*(process_order_batched(*order, scope) for order in orders))
+
+
 if __name__ == "__main__":
     asyncio.set_event_loop_policy(TimingEventLoopPolicy())
     asyncio.run(process_order("C-41", "P-314"))
@@ -0,0 +1,98 @@
+import asyncio
+import statistics
+import time
+
+from dag_workflow import Step, Workflow
+from workflow import make_order
+
+# The steps of workflow.py take as long, but don't print
+CUSTOMER_DELAY = 3
+PRODUCT_DELAY = 2
+PAYMENT_DELAY = 1
+CRITICAL_PATH = CUSTOMER_DELAY + PAYMENT_DELAY
+
+
+async def get_customer(customer_id):
+    await asyncio.sleep(CUSTOMER_DELAY)
+    return {"id": customer_id, "name": f"Customer {customer_id}"}
+
+
+async def get_product(product_id):
+    await asyncio.sleep(PRODUCT_DELAY)
+    return {"id": product_id, "name": f"Product {product_id}", "price": 99.99}
+
+
+async def process_payment(order):
+    await asyncio.sleep(PAYMENT_DELAY)
+
+
+async def process_order(customer_id, product_id):
+    """process_order() of workflow.py, hard-coded."""
+    async with asyncio.TaskGroup() as tg:
+        customer_task = tg.create_task(get_customer(customer_id))
+        product_task = tg.create_task(get_product(product_id))
+    order = await make_order(customer_task.result(), product_task.result())
+    await process_payment(order)
+
+
+def order_workflow(payment_limit=None):
+    return Workflow(
+        [
+            Step("customer", get_customer, requires=["customer_id"], timeout=5),
+            Step("product", get_product, requires=["product_id"], timeout=5),
+            Step("order", make_order, requires=["customer", "product"]),
+            Step(
+                "payment",
+                process_payment,
+                requires=["order"],
+                timeout=5,
+                limit=payment_limit,
+            ),
+        ]
+    )
+
+
+async def timed(order):
+    """Await order, and return how long it took."""
+    start_time = time.perf_counter()
+    await order
+    return time.perf_counter() - start_time
+
+
+async def bench(label, orders):
+    start_time = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(timed(order) for order in orders)))
+    duration = time.perf_counter() - start_time
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{label:<26} | {duration:6.3f} s | x{duration / CRITICAL_PATH:5.3f}"
+        f" | p50: {p50:6.3f} s | p99: {p99:6.3f} s"
+    )
+    return orders
+
+
+async def main(count):
+    print(f"{count:,} orders at once | critical path: {CRITICAL_PATH} s")
+    await bench(
+        "process_order()",
+        [process_order(f"C-{i}", f"P-{i}") for i in range(count)],
+    )
+    workflow = order_workflow()
+    await bench(
+        "workflow",
+        [workflow.run(customer_id=f"C-{i}", product_id=f"P-{i}") for i in range(count)],
+    )
+    workflow = order_workflow(payment_limit=1_000)
+    await bench(
+        "workflow, 1,000 payments",
+        [workflow.run(customer_id=f"C-{i}", product_id=f"P-{i}") for i in range(count)],
+    )
+
+    # The critical path of a single order
+    run = await order_workflow().run(customer_id="C-41", product_id="P-314")
+    print(run.report())
+
+
+if __name__ == "__main__":
+    asyncio.run(main(10_000))
@@ -1,54 +1,188 @@
 import asyncio
+import hashlib
+import json
+import os
 from aiohttp import web
 
+from sse_hub import EventHub, publish_temperature, sse_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 names_db = {
     1: "Sophia",
     2: "Michael",
 }
 
+# Seconds between server-sent events, events queued for each client, and
+# what to do with clients which fall that far behind ("drop" or "disconnect")
+EVENT_INTERVAL = float(os.environ.get("EVENT_INTERVAL", 1))
+SSE_QUEUE_SIZE = 100
+SSE_POLICY = os.environ.get("SSE_POLICY", "drop")
+
+# Seconds each lookup waits, standing in for a database round trip
+LOOKUP_DELAY = float(os.environ.get("LOOKUP_DELAY", 0))
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key.
+
+    The first caller for a key starts the call, and callers arriving
+    before it finishes await the same result instead of repeating it.
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, function, *args):
+        future = self.calls.get(key)
+        if future is None:
+            future = self.calls[key] = asyncio.ensure_future(function(*args))
+            future.add_done_callback(lambda _: self.calls.pop(key, None))
+        # A caller which is cancelled, say because its client went away,
+        # must not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+
+lookups = SingleFlight()
+
+
+def json_dumps(data):
+    return json.dumps(data).encode("utf-8")
+
+
+def orjson_dumps(data):
+    # names_db has int keys, which orjson only accepts with this option
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ResponseCache:
+    """Encoded JSON bodies, with their ETags, by resource.
+
+    Each resource is encoded once, when first requested, and served as
+    bytes until the cache is cleared. The encoder is pluggable, as any
+    function returning the JSON of its argument as bytes. Once max_size
+    resources are cached, others are encoded on every request instead, so
+    requests for made up ids can't grow the cache without limit.
+    """
+
+    def __init__(self, dumps=json_dumps, max_size=10_000):
+        self.dumps = dumps
+        self.max_size = max_size
+        self.entries = {}
+        # Bumped by clear(), so a load which started before the cache was
+        # cleared doesn't store what may already be out of date
+        self.generation = 0
+
+    async def get(self, key, load):
+        """Return (body, quoted etag, etag) for key, calling load() on a miss."""
+        entry = self.entries.get(key)
+        if entry is None:
+            generation = self.generation
+            body = self.dumps(await load())
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            entry = (body, f'"{etag}"', etag)
+            if generation == self.generation and len(self.entries) < self.max_size:
+                self.entries[key] = entry
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+        self.generation += 1
+
+
+# RESPONSE_CACHE=0 serializes every response again, as web.json_response
+# does; JSON_ENCODER=json uses the standard library even if orjson is there
+RESPONSE_CACHE = os.environ.get("RESPONSE_CACHE", "1") != "0"
+JSON_ENCODER = os.environ.get("JSON_ENCODER", "orjson")
+responses = ResponseCache(
+    orjson_dumps if JSON_ENCODER == "orjson" and orjson else json_dumps
+)
+
+
+async def json_response(request, key, load):
+    """Respond with the JSON of await load(), cached under key.
+
+    Answers 304 Not Modified when the request's If-None-Match header
+    already has the current ETag.
+    """
+    if not RESPONSE_CACHE:
+        return web.json_response(await load())
+    body, header, etag = await responses.get(key, load)
+    headers = {"ETag": header, "Cache-Control": "no-cache"}
+    if_none_match = request.if_none_match
+    if if_none_match and any(tag.value in (etag, "*") for tag in if_none_match):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+async def lookup_names(name_ids):
+    await asyncio.sleep(LOOKUP_DELAY)
+    return {name_id: names_db.get(name_id, "Unknown") for name_id in name_ids}
+
+
+async def all_names():
+    return names_db
+
 
 async def get_names(request):
-    return web.json_response(names_db)
+    ids = request.query.get("ids")
+    if ids is None:
+        return await json_response(request, "names", all_names)
+    # Batch lookup: GET /names?ids=1,2,...
+    try:
+        name_ids = [int(name_id) for name_id in ids.split(",")]
+    except ValueError:
+        raise web.HTTPBadRequest(text="ids must be comma separated integers")
+    key = tuple(dict.fromkeys(name_ids))
+    names = await lookups.do(key, lookup_names, key)
+    response = [{"id": name_id, "name": names[name_id]} for name_id in name_ids]
+    return web.json_response(response)
 
 
 async def get_name_by_id(request):
     name_id = request.match_info.get("id")
-    response = {
-        "id": name_id,
-        "name": names_db.get(int(name_id), "Unknown"),
-    }
-    return web.json_response(response)
+
+    async def load():
+        key = (int(name_id),)
+        names = await lookups.do(key, lookup_names, key)
+        return {
+            "id": name_id,
+            "name": names[key[0]],
+        }
+
+    return await json_response(request, ("name", name_id), load)
 
 
 async def add_name(request):
     data = await request.json()
     new_id = len(names_db) + 1
     names_db[new_id] = data.get("name")
+    # Adding a name changes the list of names, and the name for new_id,
+    # which may have been cached as "Unknown". Writes are rare, so start
+    # again from an empty cache rather than track which entries changed
+    responses.clear()
     return web.json_response({"id": new_id, "name": names_db[new_id]}, status=201)
 
 
 async def sse_handler(request):
-    # Initialize a streaming response
-    r = web.StreamResponse()
-    # Set headers
-    r.headers["Content-Type"] = "text/event-stream"
-    r.headers["Cache-Control"] = "no-cache"
-    r.headers["Connection"] = "keep-alive"
-    # Send headers to client
-    await r.prepare(request)
-    counter = 0
-    # Stream data events up to 3 times
-    while counter < 3:
-        counter += 1
-        data = "Temperature: 70 \n"
-        # Send event data chunk
-        await r.write(data.encode("utf-8"))
-        # Non-blocking delay for 1 second
-        await asyncio.sleep(1)
-
-    # Finalize stream
-    await r.write_eof()
-    return r
+    # Every client gets the same events, published once by the hub
+    return await sse_response(request.app["events"], request)
+
+
+async def start_events(app):
+    app["events"] = EventHub(queue_size=SSE_QUEUE_SIZE, policy=SSE_POLICY)
+    app["publisher"] = asyncio.create_task(
+        publish_temperature(app["events"], EVENT_INTERVAL)
+    )
+
+
+async def stop_events(app):
+    app["publisher"].cancel()
+    # End open streams, or shutting down would wait for them
+    app["events"].close()
 
 
 app = web.Application()
@@ -57,6 +191,8 @@ app.router.add_get("/names/{id}", get_name_by_id)
 app.router.add_post("/names", add_name)
 
 app.router.add_get("/events", sse_handler)
+app.on_startup.append(start_events)
+app.on_shutdown.append(stop_events)
 
 # gunicorn aiohttp_server:app --bind localhost:8080 --worker-class aiohttp.GunicornWebWorker --workers 2
 # web.run_app(app)
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class AsyncLRUCache:
+    """A read-through cache in front of an async lookup.
+
+    get(key) returns the cached value for key, or awaits load(key) and
+    caches its result. Concurrent misses for the same key share a single
+    load. At most max_size values are kept, evicting the least recently
+    used, and each is kept for at most ttl seconds.
+    """
+
+    def __init__(self, load, max_size=1024, ttl=60.0, clock=time.monotonic):
+        self.load = load
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if self.clock() < expires:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return value
+            del self.entries[key]
+
+        future = self.loading.get(key)
+        if future is None:
+            self.misses += 1
+            future = self.loading[key] = asyncio.ensure_future(self.load(key))
+            future.add_done_callback(lambda future: self._loaded(key, future))
+        else:
+            self.coalesced += 1
+        # A caller which is cancelled must not cancel the load for everyone
+        return await asyncio.shield(future)
+
+    def _loaded(self, key, future):
+        # Only keep the result if the key wasn't invalidated while loading
+        if self.loading.get(key) is not future:
+            return
+        del self.loading[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.entries[key] = (future.result(), self.clock() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        """Forget key, so that the next get() loads it again."""
+        self.entries.pop(key, None)
+        self.loading.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.loading.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
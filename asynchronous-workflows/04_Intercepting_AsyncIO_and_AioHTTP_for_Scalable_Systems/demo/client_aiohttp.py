@@ -1,29 +1,181 @@
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector
 import asyncio
 import time
+from functools import partial
 
 API_URLS = [
     "http://localhost:8080/names/1",
     "http://localhost:8080/names/2",
 ] * 100_000
 
+NAMES_URL = "http://localhost:8080/names"
+
+# Requests in flight at once, for the bounded fetcher
+CONCURRENCY = 100
+
+
+def make_connector(limit=CONCURRENCY):
+    # One pooled connection per request in flight, kept alive between
+    # requests, and the host resolved once rather than per connection
+    return TCPConnector(
+        limit=limit,
+        limit_per_host=limit,
+        keepalive_timeout=30,
+        use_dns_cache=True,
+        ttl_dns_cache=300,
+    )
+
 
 async def fetch(session, url):
     async with session.get(url) as response:
         return await response.json()
 
 
-async def fetch_all():
+async def fetch_all(urls=API_URLS):
     async with ClientSession() as session:
-        tasks = [fetch(session, url) for url in API_URLS]
+        tasks = [fetch(session, url) for url in urls]
         results = await asyncio.gather(*tasks)
         # print(results)
+        return results
+
+
+async def map_bounded(function, items, concurrency=CONCURRENCY):
+    """Await function(item) for each item, with at most concurrency at once.
+
+    A fixed number of workers take items from a shared iterator, so items
+    may be a generator and no more than concurrency tasks ever exist.
+    Results are yielded as (item, result) pairs in the order they
+    complete. If the caller stops consuming them, the workers block once
+    the result queue is full, so a slow consumer slows down the calls too.
+    """
+    items = iter(items)
+    results = asyncio.Queue(maxsize=concurrency)
+    done = object()
+
+    async def worker():
+        try:
+            for item in items:
+                await results.put((item, await function(item)))
+        except Exception as e:
+            await results.put(e)
+        else:
+            await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            item = await results.get()
+            if item is done:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def fetch_bounded(session, urls, concurrency=CONCURRENCY):
+    """Fetch urls with at most concurrency requests in flight.
+
+    Yields (url, result) pairs in the order the requests complete.
+    """
+    return map_bounded(partial(fetch, session), urls, concurrency)
+
+
+async def fetch_all_bounded(urls=API_URLS, concurrency=CONCURRENCY):
+    async with ClientSession(connector=make_connector(concurrency)) as session:
+        count = 0
+        async for url, result in fetch_bounded(session, urls, concurrency):
+            count += 1
+            # print(url, result)
+        return count
+
+
+class NameBatcher:
+    """Gather individual name lookups into batch requests.
+
+    Lookups made within window seconds of the first pending one are sent
+    together as a single GET /names?ids=... request, of at most max_size
+    distinct ids. Concurrent lookups of the same id share one result.
+    """
+
+    def __init__(self, session, url=NAMES_URL, window=0.002, max_size=100):
+        self.session = session
+        self.url = url
+        self.window = window
+        self.max_size = max_size
+        self.pending = {}
+        self.timer = None
+        self.requests = set()
+
+    async def fetch(self, name_id):
+        # The server answers with int ids, which the pending lookups are
+        # matched against
+        name_id = int(name_id)
+        future = self.pending.get(name_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.pending[name_id] = loop.create_future()
+            if len(self.pending) >= self.max_size:
+                self.flush()
+            elif self.timer is None:
+                self.timer = loop.call_later(self.window, self.flush)
+        # Don't let one cancelled caller cancel the result for the others
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """Send the pending lookups now."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if self.pending:
+            pending, self.pending = self.pending, {}
+            request = asyncio.create_task(self.send(pending))
+            # Keep a reference, or the task may be garbage collected
+            self.requests.add(request)
+            request.add_done_callback(self.requests.discard)
+
+    async def send(self, pending):
+        ids = ",".join(map(str, pending))
+        error = None
+        try:
+            async with self.session.get(self.url, params={"ids": ids}) as response:
+                response.raise_for_status()
+                records = await response.json()
+            for record in records:
+                future = pending.get(record["id"])
+                if future is not None and not future.done():
+                    future.set_result(record)
+        except Exception as e:
+            error = e
+        finally:
+            # Every lookup gets an answer, even when the request failed or
+            # was cancelled, or the response left some ids out
+            for name_id, future in pending.items():
+                if not future.done():
+                    future.set_exception(
+                        error or LookupError(f"No record for id {name_id}")
+                    )
+
 
+async def fetch_names_batched(name_ids, concurrency=CONCURRENCY, **options):
+    async with ClientSession(connector=make_connector(concurrency)) as session:
+        batcher = NameBatcher(session, **options)
+        count = 0
+        async for name_id, record in map_bounded(batcher.fetch, name_ids, concurrency):
+            count += 1
+            # print(record)
+        return count
 
-start_time = time.perf_counter()
 
+if __name__ == "__main__":
+    start_time = time.perf_counter()
 
-asyncio.run(fetch_all())
+    asyncio.run(fetch_all_bounded())
 
-end_time = time.perf_counter()
-print(f"Duration: {round(end_time - start_time, 2)} seconds")
+    end_time = time.perf_counter()
+    print(f"Duration: {round(end_time - start_time, 2)} seconds")
@@ -0,0 +1,165 @@
+import asyncio
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from aiohttp import ClientSession
+
+from client_aiohttp import (
+    CONCURRENCY,
+    NAMES_URL,
+    fetch_all,
+    fetch_all_bounded,
+    fetch_names_batched,
+    make_connector,
+    map_bounded,
+)
+
+HOST = "localhost"
+PORT = 8080
+DEMO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@contextlib.contextmanager
+def serve(module="aiohttp_server", app="app", host=HOST, port=PORT, **environ):
+    """Run the app of a demo server module in a child process, yielding it.
+
+    app is the expression giving the app in module, such as "create_app()".
+    Keyword arguments are set as environment variables for the server.
+    """
+    code = (
+        f"from aiohttp import web; import {module};"
+        f" web.run_app({module}.{app}, host={host!r}, port={port}, print=None)"
+    )
+    env = dict(os.environ, **environ)
+    server = subprocess.Popen([sys.executable, "-c", code], cwd=DEMO_DIR, env=env)
+    try:
+        # Wait until the server accepts connections
+        for _ in range(100):
+            try:
+                socket.create_connection((host, port)).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f"{module} did not start on {host}:{port}")
+        yield server
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def peak_rss():
+    # Linux keeps ru_maxrss across exec(), so it would include the memory
+    # of the parent process; VmHWM is the peak of this process alone
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def run(bounded, urls, concurrency):
+    """Fetch urls and return (requests, seconds, peak RSS in MiB)."""
+    start_time = time.perf_counter()
+    if bounded:
+        count = asyncio.run(fetch_all_bounded(urls, concurrency))
+    else:
+        count = len(asyncio.run(fetch_all(urls)))
+    duration = time.perf_counter() - start_time
+    return count, duration, peak_rss()
+
+
+def bench(label, bounded, urls, concurrency=None):
+    # Peak RSS never goes down, so measure each run in a fresh process
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        count, duration, rss = executor.submit(run, bounded, urls, concurrency).result()
+    assert count == len(urls)
+    print(f"{label:<18} | {count / duration:8,.0f} requests/s | {rss:7.1f} MiB")
+
+
+def bench_batching(label, name_ids, concurrency=CONCURRENCY):
+    urls = [f"http://{HOST}:{PORT}/names/{name_id}" for name_id in name_ids]
+
+    start_time = time.perf_counter()
+    count = asyncio.run(fetch_all_bounded(urls, concurrency))
+    single_time = time.perf_counter() - start_time
+    assert count == len(urls)
+
+    start_time = time.perf_counter()
+    count = asyncio.run(fetch_names_batched(name_ids, concurrency))
+    batched_time = time.perf_counter() - start_time
+    assert count == len(name_ids)
+
+    print(
+        f"{label:<14} | one per id: {count / single_time:8,.0f} lookups/s"
+        f" | batched: {count / batched_time:8,.0f} lookups/s"
+    )
+
+
+async def fetch_status(session, url):
+    async with session.get(url) as response:
+        await response.read()
+        return response.status
+
+
+async def fetch_names(urls, names, revalidate, concurrency=CONCURRENCY):
+    """Add names, then fetch urls and return (responses, seconds)."""
+    async with ClientSession(connector=make_connector(concurrency)) as session:
+        for name in names:
+            async with session.post(NAMES_URL, json={"name": name}) as response:
+                response.raise_for_status()
+        headers = {}
+        if revalidate:
+            # Send back the ETag, as a client with an HTTP cache would
+            async with session.get(NAMES_URL) as response:
+                headers["If-None-Match"] = response.headers["ETag"]
+        session.headers.update(headers)
+        start_time = time.perf_counter()
+        count = 0
+        expected = 304 if revalidate else 200
+        async for url, status in map_bounded(
+            partial(fetch_status, session), urls, concurrency
+        ):
+            assert status == expected
+            count += 1
+        return count, time.perf_counter() - start_time
+
+
+def bench_response_cache(label, urls, names, revalidate=False, **environ):
+    with serve(**environ):
+        count, duration = asyncio.run(fetch_names(urls, names, revalidate))
+    print(f"{label:<22} | {count / duration:8,.0f} requests/s")
+
+
+if __name__ == "__main__":
+    urls = [f"http://{HOST}:{PORT}/names/{i % 2 + 1}" for i in range(50_000)]
+
+    with serve():
+        print(f"{len(urls):,} requests")
+        bench("gather all", False, urls)
+        for concurrency in (10, 100, 500):
+            bench(f"bounded ({concurrency})", True, urls, concurrency)
+
+    # With a simulated 1 ms database lookup, identical lookups in flight
+    # at the same time are coalesced by the server. The response cache is
+    # off, or it would answer repeated lookups without looking them up
+    lookups = 20_000
+    with serve(LOOKUP_DELAY="0.001", RESPONSE_CACHE="0"):
+        print(f"{lookups:,} lookups")
+        bench_batching("2 distinct ids", [i % 2 + 1 for i in range(lookups)])
+        bench_batching("all distinct", list(range(1, lookups + 1)))
+
+    # The list of all names, after adding 1,000 more so that encoding it
+    # takes a noticeable time
+    urls = [NAMES_URL] * 20_000
+    names = [f"Name {i}" for i in range(1_000)]
+    print(f"{len(urls):,} requests for {len(names) + 2:,} names")
+    bench_response_cache("json_response", urls, names, RESPONSE_CACHE="0")
+    bench_response_cache("cached, json", urls, names, JSON_ENCODER="json")
+    bench_response_cache("cached, orjson", urls, names, JSON_ENCODER="orjson")
+    bench_response_cache("cached, If-None-Match", urls, names, revalidate=True)
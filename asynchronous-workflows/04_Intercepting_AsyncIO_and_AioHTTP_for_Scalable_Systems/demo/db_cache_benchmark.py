@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+
+from async_cache import AsyncLRUCache
+from db_aiohttp_server import fetch_name
+
+ROWS = 100_000
+
+
+class StubConnection:
+    """Answers the queries of db_aiohttp_server from a dict of names."""
+
+    def __init__(self, names, latency):
+        self.names = names
+        self.latency = latency
+
+    async def fetchval(self, query, *args):
+        # Stands in for the round trip to the database
+        await asyncio.sleep(self.latency)
+        return self.names.get(args[0])
+
+
+class StubPool:
+    """A pool of max_size StubConnections, like asyncpg.create_pool()."""
+
+    def __init__(self, names, max_size=20, latency=0.0005):
+        self.connections = asyncio.Queue()
+        for _ in range(max_size):
+            self.connections.put_nowait(StubConnection(names, latency))
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        conn = await self.connections.get()
+        try:
+            yield conn
+        finally:
+            self.connections.put_nowait(conn)
+
+
+class CountingPool:
+    """Wraps a pool, counting the connections acquired from it."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.acquisitions = 0
+
+    def acquire(self):
+        self.acquisitions += 1
+        return self.pool.acquire()
+
+
+async def make_pool():
+    dsn = os.environ.get("DB_DSN")
+    if not dsn:
+        return StubPool({i: f"Name {i}" for i in range(1, ROWS + 1)})
+
+    import asyncpg
+
+    pool = await asyncpg.create_pool(dsn=dsn, min_size=5, max_size=20)
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS names (id SERIAL PRIMARY KEY, name TEXT NOT NULL)"
+        )
+        count = await conn.fetchval("SELECT COUNT(*) FROM names")
+        await conn.executemany(
+            "INSERT INTO names (name) VALUES ($1)",
+            [(f"Name {i}",) for i in range(count + 1, ROWS + 1)],
+        )
+    return pool
+
+
+async def run(lookup, name_ids, concurrency=100):
+    name_ids = iter(name_ids)
+
+    async def worker():
+        for name_id in name_ids:
+            await lookup(name_id)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def bench(name_ids):
+    pool = CountingPool(await make_pool())
+
+    start_time = time.perf_counter()
+    await run(lambda name_id: fetch_name(pool, name_id), name_ids)
+    direct_time = time.perf_counter() - start_time
+    direct_acquisitions = pool.acquisitions
+    print(
+        f"no cache | {len(name_ids) / direct_time:8,.0f} lookups/s"
+        f" | {direct_acquisitions:>7,} acquisitions"
+    )
+
+    pool.acquisitions = 0
+    cache = AsyncLRUCache(lambda name_id: fetch_name(pool, name_id), max_size=10_000)
+    start_time = time.perf_counter()
+    await run(cache.get, name_ids)
+    cached_time = time.perf_counter() - start_time
+    stats = cache.stats()
+    print(
+        f"cached   | {len(name_ids) / cached_time:8,.0f} lookups/s"
+        f" | {pool.acquisitions:>7,} acquisitions"
+        f" | hit rate: {stats['hit_rate']:.1%} | evictions: {stats['evictions']:,}"
+    )
+
+    # The cache gives the same answers as the database
+    for name_id in random.sample(name_ids, 1_000):
+        assert await cache.get(name_id) == await fetch_name(pool, name_id)
+
+
+if __name__ == "__main__":
+    # Ids with a Zipf-like skew: a few hot ids take most of the lookups
+    rng = random.Random(0)
+    weights = [1 / rank for rank in range(1, ROWS + 1)]
+    name_ids = rng.choices(range(1, ROWS + 1), weights=weights, k=200_000)
+
+    print(f"{len(name_ids):,} lookups of {ROWS:,} ids")
+    print("database:", "Postgres" if os.environ.get("DB_DSN") else "stub pool")
+    asyncio.run(bench(name_ids))
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+import time
+from functools import partial
+
+from aiohttp import ClientSession
+
+from client_aiohttp import NAMES_URL, make_connector, map_bounded
+from client_aiohttp_benchmark import serve
+
+CONCURRENCY = 100
+
+
+async def post(session, url, data):
+    async with session.post(url, json=data) as response:
+        response.raise_for_status()
+        return await response.json()
+
+
+async def insert(url, payloads, concurrency=CONCURRENCY):
+    """POST each payload to url, and return the seconds it took."""
+    async with ClientSession(connector=make_connector(concurrency)) as session:
+        start_time = time.perf_counter()
+        async for payload, result in map_bounded(
+            partial(post, session, url), payloads, concurrency
+        ):
+            pass
+        return time.perf_counter() - start_time
+
+
+def bench(label, url, payloads, names, **environ):
+    with serve("db_aiohttp_server", "create_app()", **environ):
+        duration = asyncio.run(insert(url, payloads))
+    print(f"{label:<24} | {names / duration:9,.0f} inserts/s")
+
+
+if __name__ == "__main__":
+    if not os.environ.get("DB_DSN"):
+        sys.exit("Set DB_DSN to the Postgres database to insert into")
+
+    count = 20_000
+    names = [f"Name {i}" for i in range(count)]
+    print(f"{count:,} names, {CONCURRENCY} requests in flight")
+
+    payloads = [{"name": name} for name in names]
+    bench("POST /names", NAMES_URL, payloads, count, WRITE_BUFFER="0")
+    bench("POST /names, buffered", NAMES_URL, payloads, count)
+
+    for size in (100, 1_000):
+        payloads = [{"names": names[i : i + size]} for i in range(0, count, size)]
+        bench(f"POST /names/bulk ({size:,})", f"{NAMES_URL}/bulk", payloads, count)
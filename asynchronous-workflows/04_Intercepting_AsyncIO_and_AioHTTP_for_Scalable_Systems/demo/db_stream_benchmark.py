@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import time
+
+import asyncpg
+from aiohttp import ClientSession
+
+from client_aiohttp import NAMES_URL
+from client_aiohttp_benchmark import serve
+
+
+async def fill(dsn, rows):
+    """Add names until the names table has at least rows rows."""
+    conn = await asyncpg.connect(dsn)
+    try:
+        count = await conn.fetchval("SELECT COUNT(*) FROM names")
+        await conn.copy_records_to_table(
+            "names",
+            records=((f"Name {i}",) for i in range(count + 1, rows + 1)),
+            columns=["name"],
+        )
+    finally:
+        await conn.close()
+
+
+async def read_stream(params):
+    """Read a streamed response a chunk at a time, returning its size."""
+    size = 0
+    async with ClientSession() as session:
+        async with session.get(NAMES_URL, params=params) as response:
+            async for chunk in response.content.iter_chunked(2**16):
+                size += len(chunk)
+    return size
+
+
+async def read_pages(limit):
+    """Follow next_after_id through every page, returning the names read."""
+    count = 0
+    after_id = 0
+    async with ClientSession() as session:
+        while after_id is not None:
+            params = {"after_id": after_id, "limit": limit}
+            async with session.get(NAMES_URL, params=params) as response:
+                page = await response.json()
+            count += len(page["names"])
+            after_id = page["next_after_id"]
+    return count
+
+
+def peak_rss(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def bench(label, read, rows):
+    # Peak RSS never goes down, so start a fresh server for each run
+    with serve("db_aiohttp_server", "create_app()") as server:
+        start_time = time.perf_counter()
+        asyncio.run(read)
+        duration = time.perf_counter() - start_time
+        rss = peak_rss(server.pid)
+    print(f"{label:<14} | {rows / duration:9,.0f} rows/s | server: {rss:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    dsn = os.environ.get("DB_DSN")
+    if not dsn:
+        sys.exit("Set DB_DSN to the Postgres database to read from")
+
+    for rows in (200_000, 2_000_000):
+        asyncio.run(fill(dsn, rows))
+        print(f"{rows:,} rows")
+        bench("JSON stream", read_stream({}), rows)
+        bench("NDJSON stream", read_stream({"format": "ndjson"}), rows)
+        bench("pages (1,000)", read_pages(1_000), rows)
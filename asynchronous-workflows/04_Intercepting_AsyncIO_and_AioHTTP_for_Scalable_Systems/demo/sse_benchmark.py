@@ -0,0 +1,111 @@
+import asyncio
+import time
+import tracemalloc
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from client_aiohttp_benchmark import HOST, PORT, serve
+from sse_hub import DISCONNECT, DROP, EventHub
+
+EVENTS_URL = f"http://{HOST}:{PORT}/events"
+
+
+async def consume(subscriber, counts, index):
+    while True:
+        events = await subscriber.next_events(64)
+        if not events:
+            return
+        counts[index] += len(events)
+
+
+async def bench_hub(subscribers, events, policy, slow_every=100):
+    """Fan events out to subscribers, one in slow_every of which never read."""
+    hub = EventHub(policy=policy)
+    counts = [0] * subscribers
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    consumers = []
+    readers = []
+    for index in range(subscribers):
+        subscriber = hub.subscribe()
+        if index % slow_every:
+            readers.append(subscriber)
+            consumers.append(asyncio.create_task(consume(subscriber, counts, index)))
+    await asyncio.sleep(0)
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+
+    start_time = time.perf_counter()
+    for _ in range(events):
+        hub.publish("Temperature: 70")
+        # Let the subscribers catch up, as the interval between events would
+        await asyncio.sleep(0)
+    # Wait until the subscribers which read have read everything
+    while any(subscriber.events for subscriber in readers):
+        await asyncio.sleep(0.001)
+    duration = time.perf_counter() - start_time
+
+    dropped = sum(subscriber.dropped for subscriber in hub.subscribers)
+    hub.close()
+    await asyncio.gather(*consumers)
+    print(
+        f"{policy:<10} | {sum(counts) / duration:12,.0f} events/s delivered"
+        f" | {per_subscriber:6,.0f} bytes/subscriber"
+        f" | dropped: {dropped:,} | disconnected: {hub.disconnected:,}"
+    )
+
+
+async def listen(session, counts, index, duration):
+    async with session.get(EVENTS_URL) as response:
+        deadline = time.perf_counter() + duration
+        async for chunk in response.content.iter_any():
+            # Each event ends with a blank line
+            counts[index] += chunk.count(b"\n\n")
+            if time.perf_counter() > deadline:
+                break
+
+
+def rss(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+
+
+async def bench_http(clients, duration, pid):
+    counts = [0] * clients
+    connector = TCPConnector(limit=0)
+    timeout = ClientTimeout(total=None)
+    async with ClientSession(connector=connector, timeout=timeout) as session:
+        before = rss(pid)
+        listeners = [
+            asyncio.create_task(listen(session, counts, index, duration))
+            for index in range(clients)
+        ]
+        # Wait until every client has received something
+        while not all(counts):
+            await asyncio.sleep(0.1)
+        per_client = (rss(pid) - before) / clients
+        start = sum(counts)
+        start_time = time.perf_counter()
+        await asyncio.gather(*listeners)
+        received = sum(counts) - start
+        elapsed = time.perf_counter() - start_time
+    print(
+        f"{clients:,} clients | {received / elapsed:10,.0f} events/s received"
+        f" | server: {per_client / 1024:5.1f} KiB/client"
+    )
+
+
+if __name__ == "__main__":
+    subscribers = 50_000
+    print(f"Hub: {subscribers:,} subscribers, 1 in 100 never reading")
+    for policy in (DROP, DISCONNECT):
+        asyncio.run(bench_hub(subscribers, 200, policy))
+
+    interval = 0.01
+    print(f"HTTP: one event every {interval} s")
+    with serve(EVENT_INTERVAL=str(interval)) as server:
+        for clients in (100, 1_000):
+            asyncio.run(bench_http(clients, 5, server.pid))
@@ -0,0 +1,162 @@
+import asyncio
+import itertools
+from collections import deque
+
+from aiohttp import web
+
+# What happens to a subscriber whose queue is full when an event arrives
+DROP = "drop"  # Drop its oldest queued event to make room
+DISCONNECT = "disconnect"  # Close its stream; it can resume with Last-Event-ID
+
+
+class Subscriber:
+    """The events waiting to be sent to one client."""
+
+    __slots__ = ("backlog", "events", "waiter", "closed", "dropped")
+
+    def __init__(self, backlog=()):
+        # Events missed before subscribing, sent ahead of the others
+        self.backlog = deque(backlog) if backlog else None
+        self.events = deque()
+        self.waiter = None
+        self.closed = False
+        self.dropped = 0
+
+    async def next_events(self, max_count):
+        """Wait for the next events, and return up to max_count of them.
+
+        Returns an empty list once the subscriber has been closed.
+        """
+        events = self.backlog or self.events
+        while not events:
+            if self.closed:
+                return []
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+            events = self.events
+        return [events.popleft() for _ in range(min(max_count, len(events)))]
+
+    def wake(self):
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def close(self):
+        self.closed = True
+        self.events.clear()
+        self.wake()
+
+
+class EventHub:
+    """Broadcast server-sent events to many subscribers.
+
+    publish() encodes each event once and puts the same bytes on the
+    queue of every subscriber, which holds at most queue_size events. The
+    last history events are kept in a ring buffer, so that a client
+    reconnecting with a Last-Event-ID header gets the events it missed
+    before new ones.
+    """
+
+    def __init__(self, queue_size=100, history=1_000, policy=DROP):
+        if policy not in (DROP, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy {policy!r}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.history = deque(maxlen=history)
+        self.subscribers = set()
+        self.ids = itertools.count(1)
+        self.published = 0
+        self.disconnected = 0
+
+    def publish(self, data, event=None):
+        """Send data to every subscriber, and return the id of the event."""
+        event_id = next(self.ids)
+        lines = [f"id: {event_id}"]
+        if event is not None:
+            lines.append(f"event: {event}")
+        lines.extend(f"data: {line}" for line in data.splitlines())
+        encoded = ("\n".join(lines) + "\n\n").encode("utf-8")
+        self.history.append((event_id, encoded))
+        self.published += 1
+
+        # This loop runs once per subscriber per event, so it is kept lean
+        queue_size = self.queue_size
+        slow = []
+        for subscriber in self.subscribers:
+            events = subscriber.events
+            if len(events) >= queue_size:
+                if self.policy == DISCONNECT:
+                    slow.append(subscriber)
+                    continue
+                events.popleft()
+                subscriber.dropped += 1
+            events.append(encoded)
+            waiter = subscriber.waiter
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+
+        for subscriber in slow:
+            self.unsubscribe(subscriber)
+            subscriber.close()
+        self.disconnected += len(slow)
+        return event_id
+
+    def subscribe(self, last_event_id=None):
+        backlog = ()
+        if last_event_id is not None:
+            backlog = [
+                encoded
+                for event_id, encoded in self.history
+                if event_id > last_event_id
+            ]
+        subscriber = Subscriber(backlog)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def close(self):
+        """Close every subscriber's stream, as when shutting down."""
+        for subscriber in self.subscribers:
+            subscriber.close()
+        self.subscribers.clear()
+
+
+async def sse_response(hub, request, max_batch=64):
+    """Stream the events of hub to the client of request."""
+    try:
+        last_event_id = int(request.headers["Last-Event-ID"])
+    except (KeyError, ValueError):
+        last_event_id = None
+
+    r = web.StreamResponse()
+    r.headers["Content-Type"] = "text/event-stream"
+    r.headers["Cache-Control"] = "no-cache"
+    r.headers["Connection"] = "keep-alive"
+    await r.prepare(request)
+
+    subscriber = hub.subscribe(last_event_id)
+    try:
+        while True:
+            events = await subscriber.next_events(max_batch)
+            if not events:
+                break  # Closed by the hub
+            # Events which queued up while the last write was in progress
+            # go out together, in a single write
+            await r.write(b"".join(events))
+    except ConnectionResetError:
+        pass  # The client went away
+    finally:
+        hub.unsubscribe(subscriber)
+    return r
+
+
+async def publish_temperature(hub, interval=1):
+    """Publish a temperature reading every interval seconds, forever."""
+    while True:
+        hub.publish("Temperature: 70")
+        await asyncio.sleep(interval)